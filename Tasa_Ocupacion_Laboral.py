@@ -1,52 +1,55 @@
 import streamlit as st
 import plotly.express as px
-from utils.carga_datos import cargar_datos_empleabilidad
+from utils.carga_datos import cargar_datos_empleabilidad, cargar_vistas
 from utils.estilos import aplicar_tema_plotly, mostrar_tarjeta_nota
-from utils.filtros import aplicar_filtros
+from utils.filtros import evaluar_filtros, restricciones, COLUMNAS_FILTROS
+from utils.tasas import tasas_empleo
 
 aplicar_tema_plotly()
 st.title("Tasa de ocupación laboral")
 
+# Columnas que usa esta página (se cargan solo estas)
+COLUMNAS = COLUMNAS_FILTROS + [
+    "Esta_empleado",
+    "Trimestre",
+    "Periodo",
+]
+
 # Cargar datos sin procesar
 with st.spinner("Cargando datos..."):
-    df_base = cargar_datos_empleabilidad()
+    df_base = cargar_datos_empleabilidad(COLUMNAS)
 
 # Procesamiento específico de esta página
-df = df_base.copy()
-
-def asignar_trimestre(mes):
-    return {2: 'Q1', 5: 'Q2', 9: 'Q3', 11: 'Q4'}.get(mes, None)
-
-df['Trimestre'] = df['Mes.1'].apply(asignar_trimestre)
-df['Esta_empleado'] = df['SALARIO.1'].notnull() | df['RUCEMP.1'].notnull()
+# (Trimestre, Periodo y Esta_empleado ya vienen calculados del almacén)
+df = df_base
 df = df[df["Trimestre"].notnull()]
-df["Periodo"] = df["Anio.1"].astype(str) + " " + df["Trimestre"]
 
 # --------------------------
 # FILTROS
 # --------------------------
-df_fil, selecciones = aplicar_filtros(df, incluir=["Nivel", "Oferta Actual", "Facultad", "Carrera", "Cohorte_multi", "Trabajo Formal"])
+mascara, _, selecciones = evaluar_filtros(df, incluir=["Nivel", "Oferta Actual", "Facultad", "Carrera", "Cohorte_multi", "Trabajo Formal"])
+
+# Las tasas se responden desde las vistas agregadas, con las mismas
+# selecciones y solo los meses con trimestre (las filas que quedan en df)
+vistas = cargar_vistas()
+filtros = restricciones(selecciones) + [("Periodo", list(df["Periodo"].cat.categories))]
 
 # --------------------------
 # AGRUPACIÓN Y GRÁFICO
 # --------------------------
-if df_fil.empty:
+if not mascara.any():
     st.warning("No hay datos disponibles con los filtros seleccionados.")
 else:
     # Si hay múltiples años seleccionados, agrupar por Periodo y Cohorte
     if isinstance(selecciones.get('Cohorte_multi'), list) and len(selecciones['Cohorte_multi']) > 1:
-        
-        # Total de graduados únicos por cohorte
-        totales_cohorte = df_fil.groupby('AnioGraduacion.1')['IdentificacionBanner.1'].nunique().to_dict()
-
-        # Empleados por cohorte y periodo (mes observado)
-        resumen = df_fil[df_fil['Esta_empleado']].groupby(['Periodo', 'AnioGraduacion.1'])['IdentificacionBanner.1'].nunique().reset_index()
-        resumen = resumen.rename(columns={'IdentificacionBanner.1': 'empleados'})
+        # Empleados por cohorte y periodo (mes observado) sobre el total de
+        # graduados de cada cohorte (fijo)
+        resumen = vistas.consultar(
+            "tasas", ['Periodo', 'AnioGraduacion.1'], filtros, total_por=['AnioGraduacion.1'],
+            respaldo=lambda: tasas_empleo(df, ['Periodo', 'AnioGraduacion.1'], mascara, total_por=['AnioGraduacion.1']),
+        )
+        resumen = resumen.rename(columns={'tasa': 'tasa_empleabilidad'})
 
-        # Añadir total de graduados por cohorte (fijo)
-        resumen['total'] = resumen['AnioGraduacion.1'].map(totales_cohorte)
-        resumen['tasa_empleabilidad'] = resumen['empleados'] / resumen['total']
-        
         fig = px.line(
             resumen,
             x='Periodo',
@@ -64,15 +67,13 @@ else:
         if isinstance(cohorte, list):
             cohorte = cohorte[0]
 
-        # Total de graduados de esa cohorte
-        total = df_fil['IdentificacionBanner.1'].nunique()
+        # Empleados por periodo sobre el total de graduados filtrados
+        resumen = vistas.consultar(
+            "tasas", ['Periodo'], filtros, total_por=[],
+            respaldo=lambda: tasas_empleo(df, ['Periodo'], mascara, total_por=[]),
+        )
+        resumen = resumen.rename(columns={'tasa': 'tasa_empleabilidad'})
 
-        # Empleados por periodo
-        resumen = df_fil[df_fil['Esta_empleado']].groupby(['Periodo'])['IdentificacionBanner.1'].nunique().reset_index()
-        resumen = resumen.rename(columns={'IdentificacionBanner.1': 'empleados'})
-        resumen['total'] = total
-        resumen['tasa_empleabilidad'] = resumen['empleados'] / resumen['total']
-        
         fig = px.line(
             resumen,
             x='Periodo',
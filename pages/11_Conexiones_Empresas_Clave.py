@@ -1,22 +1,33 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from utils.carga_datos import cargar_datos_empleabilidad
+from utils.carga_datos import cargar_datos_empleabilidad, cargar_vistas
 from utils.estilos import aplicar_tema_plotly, mostrar_tarjeta_nota
-from utils.filtros import aplicar_filtros
+from utils.enriquecimiento import rellenar_vacios
+from utils.filtros import aplicar_filtros, restricciones, COLUMNAS_FILTROS
+from utils.vistas import contar_por, conteo_ordenado, ultimo_por_graduado
 
 aplicar_tema_plotly()
 st.title("Conexiones con Empresas Clave")
 
+# Columnas que usa esta página (se cargan solo estas)
+COLUMNAS = COLUMNAS_FILTROS + [
+    "Mes.1",
+    "SALARIO.1",
+    "NOMEMP.1",
+    "SECTOR",
+    "Cantidad de empleados",
+    "Empleo formal normalizado",
+]
+
 # 🌀 Cargar datos
 with st.spinner("Cargando datos..."):
-    df_base = cargar_datos_empleabilidad()
+    df_base = cargar_datos_empleabilidad(COLUMNAS)
 
 # Preprocesamiento
-df = df_base.copy()
-df["SALARIO.1"] = pd.to_numeric(df["SALARIO.1"], errors="coerce")
-df["Empleo formal"] = df["Empleo formal"].astype(str).str.strip().str.upper()
-df["NOMEMP.1"] = df["NOMEMP.1"].fillna("SIN EMPRESA")
+df = df_base
+df["Empleo formal"] = df["Empleo formal normalizado"]
+df["NOMEMP.1"] = rellenar_vacios(df["NOMEMP.1"], "SIN EMPRESA")
 df["Cantidad de empleados"] = pd.to_numeric(
     df["Cantidad de empleados"], errors="coerce"
 ).fillna(0)
@@ -41,64 +52,84 @@ df_fil, selecciones = aplicar_filtros(
     ],
 )
 
-# --------------------------
-# FILTROS ADICIONALES
-# --------------------------
-sector_sel = st.selectbox(
-    "Sector Económico", ["Todos"] + sorted(df_fil["SECTOR"].dropna().unique())
-)
-if sector_sel != "Todos":
-    df_fil = df_fil[df_fil["SECTOR"] == sector_sel]
-
-tam_min = int(df_fil["Cantidad de empleados"].min())
-tam_max = int(df_fil["Cantidad de empleados"].max())
-tamano_rango = st.slider(
-    "Tamaño de empresa (Cantidad de empleados)",
-    min_value=tam_min,
-    max_value=tam_max,
-    value=(tam_min, tam_max),
-    step=1,
-)
-df_fil = df_fil[
-    (df_fil["Cantidad de empleados"] >= tamano_rango[0])
-    & (df_fil["Cantidad de empleados"] <= tamano_rango[1])
-]
 
-# --------------------------
-# LÓGICA DE ÚNICO POR GRADUADO
-# --------------------------
-df_emp_unicos = df_fil.sort_values(
-    ["IdentificacionBanner.1", "Mes.1", "SALARIO.1"], ascending=[True, False, False]
-).drop_duplicates(subset="IdentificacionBanner.1", keep="first")
+@st.fragment
+def mostrar_top_empresas(df_fil):
+    # Sector y tamaño solo afectan a este bloque: cambiarlos no vuelve a
+    # evaluar los filtros ni a cargar los datos
+    # --------------------------
+    # FILTROS ADICIONALES
+    # --------------------------
+    sector_sel = st.selectbox(
+        "Sector Económico", ["Todos"] + sorted(df_fil["SECTOR"].dropna().unique())
+    )
+    if sector_sel != "Todos":
+        df_fil = df_fil[df_fil["SECTOR"] == sector_sel]
 
-# --------------------------
-# CÁLCULO DEL TOP Y PORCENTAJES
-# --------------------------
-top_empresas = df_emp_unicos["NOMEMP.1"].value_counts().nlargest(10).reset_index()
-top_empresas.columns = ["Empresa", "Contrataciones"]
+    tam_min = int(df_fil["Cantidad de empleados"].min())
+    tam_max = int(df_fil["Cantidad de empleados"].max())
+    tamano_rango = st.slider(
+        "Tamaño de empresa (Cantidad de empleados)",
+        min_value=tam_min,
+        max_value=tam_max,
+        value=(tam_min, tam_max),
+        step=1,
+    )
+    filas_sector = len(df_fil)
+    df_fil = df_fil[
+        (df_fil["Cantidad de empleados"] >= tamano_rango[0])
+        & (df_fil["Cantidad de empleados"] <= tamano_rango[1])
+    ]
 
-total_unicos = df_emp_unicos.shape[0]
-top_empresas["PorcentajeTexto"] = (
-    top_empresas["Contrataciones"] / total_unicos * 100
-).round(2).astype(str) + "%"
+    # --------------------------
+    # LÓGICA DE ÚNICO POR GRADUADO
+    # --------------------------
+    # Con filtros solo sobre atributos del graduado el registro de cada uno no
+    # depende de ellos y los conteos salen de la vista agregada; el sector, el
+    # tamaño o "Trabajo Formal" obligan a elegirlo sobre las filas filtradas
+    filtros = restricciones(selecciones)
+    if sector_sel != "Todos":
+        filtros.append(("SECTOR", [sector_sel]))
+    if len(df_fil) < filas_sector:
+        filtros.append(("Cantidad de empleados", list(tamano_rango)))
+    por_empresa = cargar_vistas().consultar(
+        "empresas", ["NOMEMP.1"], filtros,
+        respaldo=lambda: contar_por(ultimo_por_graduado(df_fil), ["NOMEMP.1"]),
+    )
 
-# --------------------------
-# GRÁFICO DE EMPRESAS (con texto en %)
-# --------------------------
-fig = px.bar(
-    top_empresas,
-    x="Empresa",
-    y="Contrataciones",
-    text="PorcentajeTexto",
-    title="Top 10 empresas que contratan graduados",
-    hover_data={"PorcentajeTexto": False},
-)
-fig.update_layout(
-    yaxis_title="Número de graduados contratados",
-    xaxis={"categoryorder": "total descending"},
-)
-fig.update_traces(textposition="outside")
-st.plotly_chart(fig, use_container_width=True)
+    # --------------------------
+    # CÁLCULO DEL TOP Y PORCENTAJES
+    # --------------------------
+    # NOMEMP.1 es categórica: se descartan las empresas sin graduados tras los filtros
+    contrataciones = conteo_ordenado(por_empresa, "NOMEMP.1", df_fil["NOMEMP.1"].cat.categories)
+    top_empresas = contrataciones[contrataciones > 0].nlargest(10).reset_index()
+    top_empresas.columns = ["Empresa", "Contrataciones"]
+
+    total_unicos = por_empresa["graduados"].sum()
+    top_empresas["PorcentajeTexto"] = (
+        top_empresas["Contrataciones"] / total_unicos * 100
+    ).round(2).astype(str) + "%"
+
+    # --------------------------
+    # GRÁFICO DE EMPRESAS (con texto en %)
+    # --------------------------
+    fig = px.bar(
+        top_empresas,
+        x="Empresa",
+        y="Contrataciones",
+        text="PorcentajeTexto",
+        title="Top 10 empresas que contratan graduados",
+        hover_data={"PorcentajeTexto": False},
+    )
+    fig.update_layout(
+        yaxis_title="Número de graduados contratados",
+        xaxis={"categoryorder": "total descending"},
+    )
+    fig.update_traces(textposition="outside")
+    st.plotly_chart(fig, use_container_width=True)
+
+
+mostrar_top_empresas(df_fil)
 
 # --------------------------
 # NOTA
@@ -1,31 +1,39 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from utils.carga_datos import cargar_datos_empleabilidad
+from utils.carga_datos import cargar_datos_empleabilidad, cargar_vistas
 from utils.estilos import aplicar_tema_plotly, mostrar_tarjeta_nota
-from utils.filtros import aplicar_filtros
+from utils.enriquecimiento import rellenar_vacios
+from utils.filtros import evaluar_filtros, restricciones, seleccionar_filas, COLUMNAS_FILTROS
+from utils.vistas import contar_por, ultimo_por_graduado
 
 # Aplicar tema y título
 aplicar_tema_plotly()
 st.title("Ranking de Cargos")
 
+# Columnas que usa esta página (se cargan solo estas)
+COLUMNAS = COLUMNAS_FILTROS + [
+    "Mes.1",
+    "SALARIO.1",
+    "OCUAFI.1",
+    "Empleo formal normalizado",
+]
+
 # 🌀 Cargar datos
 with st.spinner("Cargando datos..."):
-    df_base = cargar_datos_empleabilidad()
+    df_base = cargar_datos_empleabilidad(COLUMNAS)
 
 # --------------------------
 # Limpieza y exclusión de 'DESCONOCIDO'
 # --------------------------
-df = df_base.copy()
-df["Empleo formal"] = df["Empleo formal"].astype(str).str.strip().str.upper()
+df = df_base
+df["Empleo formal"] = df["Empleo formal normalizado"]
 df = df[df["Empleo formal"] != "DESCONOCIDO"]  # excluye 'DESCONOCIDO'
-df["SALARIO.1"] = pd.to_numeric(df["SALARIO.1"], errors="coerce")
-df["OCUAFI.1"] = df["OCUAFI.1"].fillna("SIN INFORMACIÓN")
+df["OCUAFI.1"] = rellenar_vacios(df["OCUAFI.1"], "SIN INFORMACIÓN")
 
 # --------------------------
 # FILTROS
 # --------------------------
-df_fil, selecciones = aplicar_filtros(
+mascara, _, selecciones = evaluar_filtros(
     df,
     incluir=[
         "Nivel",
@@ -41,20 +49,27 @@ df_fil, selecciones = aplicar_filtros(
 # LÓGICA DE ÚNICO POR GRADUADO
 # --------------------------
 # Para cada graduado, tomar su registro del mes más reciente (mayor Mes.1)
-# y, en caso de empate en Mes.1, el de mayor SALARIO.1.
-df_emp_unicos = df_fil.sort_values(
-    ["IdentificacionBanner.1", "Mes.1", "SALARIO.1"], ascending=[True, False, False]
-).drop_duplicates(subset="IdentificacionBanner.1", keep="first")
+# y, en caso de empate en Mes.1, el de mayor SALARIO.1. Con filtros solo
+# sobre atributos del graduado ese registro no depende de ellos y los
+# conteos salen de la vista agregada; con "Trabajo Formal" se eligen sobre
+# las filas filtradas.
+por_cargo = cargar_vistas().consultar(
+    "cargos", ["OCUAFI.1"], restricciones(selecciones),
+    respaldo=lambda: contar_por(
+        ultimo_por_graduado(seleccionar_filas(df, mascara)), ["OCUAFI.1"], sumas=["SALARIO.1"]
+    ),
+)
 
 # --------------------------
 # CÁLCULO DE TOTALES, PORCENTAJES Y SALARIO PROMEDIO
 # --------------------------
-total_unicos = df_emp_unicos.shape[0]
+total_unicos = por_cargo["graduados"].sum()
 
 resumen = (
-    df_emp_unicos.groupby("OCUAFI.1")
-    .agg(Total=("OCUAFI.1", "count"), SalarioPromedio=("SALARIO.1", "mean"))
-    .reset_index()
+    por_cargo.assign(
+        Total=por_cargo["graduados"],
+        SalarioPromedio=por_cargo["SALARIO.1_suma"] / por_cargo["SALARIO.1_n"],
+    )[["OCUAFI.1", "Total", "SalarioPromedio"]]
     .sort_values("Total", ascending=False)
     .head(15)
 )
@@ -5,7 +5,7 @@ from dateutil.relativedelta import relativedelta
 
 from utils.carga_datos import cargar_datos_empleabilidad
 from utils.estilos import aplicar_tema_plotly, mostrar_tarjeta_nota
-from utils.filtros import aplicar_filtros
+from utils.filtros import aplicar_filtros, COLUMNAS_FILTROS
 
 # ------------------------------------------------------------------
 # AJUSTES ESTÉTICOS
@@ -16,20 +16,25 @@ st.title("Duración del Empleo")
 # ------------------------------------------------------------------
 # 1. CARGA Y PRE-PROCESAMIENTO
 # ------------------------------------------------------------------
+# Columnas que usa esta página (se cargan solo estas)
+COLUMNAS = COLUMNAS_FILTROS + [
+    "FECINGAFI.1",
+    "NOMEMP.1",
+    "Empleo formal normalizado",
+]
 with st.spinner("Cargando datos..."):
-    df_base = cargar_datos_empleabilidad()
+    df_base = cargar_datos_empleabilidad(COLUMNAS)
 
-df_base["FECINGAFI.1"] = pd.to_datetime(df_base["FECINGAFI.1"], errors="coerce")
-df_base["Empleo formal"] = df_base["Empleo formal"].astype(str).str.strip().str.upper()
-df_base = df_base.dropna(subset=["FECINGAFI.1", "IdentificacionBanner.1", "NOMEMP.1"])
+df_base["Empleo formal"] = df_base["Empleo formal normalizado"]
+df_base = df_base.dropna(subset=["FECINGAFI.1", "id_persona", "NOMEMP.1"])
 
 # ------------------------------------------------------------------
 # 2. CÁLCULO DE DURACIÓN EN CADA EMPLEO (incluye el último empleo)
 # ------------------------------------------------------------------
-df_ordenado = df_base.sort_values(["IdentificacionBanner.1", "NOMEMP.1", "FECINGAFI.1"])
+df_ordenado = df_base.sort_values(["id_persona", "NOMEMP.1", "FECINGAFI.1"])
 
 empleos = []
-for _, grupo in df_ordenado.groupby(["IdentificacionBanner.1", "NOMEMP.1"]):
+for _, grupo in df_ordenado.groupby(["id_persona", "NOMEMP.1"], observed=True):
     fechas = grupo["FECINGAFI.1"].tolist()
     for i in range(len(fechas) - 1):
         inicio, fin = fechas[i], fechas[i + 1]
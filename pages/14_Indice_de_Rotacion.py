@@ -5,7 +5,7 @@ import streamlit as st
 
 from utils.carga_datos import cargar_datos_empleabilidad
 from utils.estilos import aplicar_tema_plotly, mostrar_tarjeta_nota
-from utils.filtros import aplicar_filtros
+from utils.filtros import aplicar_filtros, COLUMNAS_FILTROS
 
 # ------------------------------------------------------------------
 # AJUSTES GLOBALES
@@ -16,17 +16,21 @@ st.title("Índice de Rotación")
 # ------------------------------------------------------------------
 # 1. CARGA Y BLOQUEO DE COHORTE 2024
 # ------------------------------------------------------------------
+# Columnas que usa esta página (se cargan solo estas)
+COLUMNAS = COLUMNAS_FILTROS + [
+    "FECINGAFI.1",
+    "NOMEMP.1",
+]
 with st.spinner("Cargando datos..."):
-    df = cargar_datos_empleabilidad()
+    df = cargar_datos_empleabilidad(COLUMNAS)
 
-df = df[df["AnioGraduacion.1"] == 2024].copy()  # 🔒 Solo cohorte 2024
+df = df[df["AnioGraduacion.1"] == 2024]  # 🔒 Solo cohorte 2024
 
 # ------------------------------------------------------------------
 # 2. LIMPIEZA Y ORDEN
 # ------------------------------------------------------------------
-df["FECINGAFI.1"] = pd.to_datetime(df["FECINGAFI.1"], errors="coerce")
-df = df.dropna(subset=["FECINGAFI.1", "IdentificacionBanner.1", "NOMEMP.1"])
-df = df.sort_values(by=["IdentificacionBanner.1", "FECINGAFI.1"])
+df = df.dropna(subset=["FECINGAFI.1", "id_persona", "NOMEMP.1"])
+df = df.sort_values(by=["id_persona", "FECINGAFI.1"])
 
 # ------------------------------------------------------------------
 # 3. FILTROS (sin Cohorte)
@@ -43,7 +47,7 @@ df_fil, selecciones = aplicar_filtros(
 def calcular_rotacion(df_filtrado: pd.DataFrame):
     rotaciones = []
 
-    for pid, grupo in df_filtrado.groupby("IdentificacionBanner.1"):
+    for pid, grupo in df_filtrado.groupby("id_persona"):
         grupo = grupo.sort_values("FECINGAFI.1")
         empresas = grupo["NOMEMP.1"].tolist()
         fechas = grupo["FECINGAFI.1"].tolist()
@@ -63,7 +67,7 @@ def calcular_rotacion(df_filtrado: pd.DataFrame):
 
         rotaciones.append(
             {
-                "IdentificacionBanner.1": pid,
+                "id_persona": pid,
                 "CarreraHomologada.1": carrera,
                 "Rotacion": rotado,
             }
@@ -73,7 +77,7 @@ def calcular_rotacion(df_filtrado: pd.DataFrame):
     resumen = (
         df_rot.groupby("CarreraHomologada.1")
         .agg(
-            Total=("IdentificacionBanner.1", "count"),
+            Total=("id_persona", "count"),
             ConRotacion=("Rotacion", "sum"),
         )
         .reset_index()
@@ -2,22 +2,29 @@ import pandas as pd
 import streamlit as st
 from utils.carga_datos import cargar_datos_empleabilidad
 from utils.estilos import aplicar_tema_plotly, mostrar_tarjeta_nota
-from utils.filtros import aplicar_filtros
+from utils.filtros import aplicar_filtros, COLUMNAS_FILTROS
 
 aplicar_tema_plotly()
 st.title("Movilidad Intersectorial")
 
+# Columnas que usa esta página (se cargan solo estas)
+COLUMNAS = COLUMNAS_FILTROS + [
+    "IdentificacionBanner.1",
+    "Estudiante.1",
+    "FECINGAFI.1",
+    "SECTOR",
+]
+
 # === Cargar datos con spinner ===
 with st.spinner("Cargando datos..."):
-    df = cargar_datos_empleabilidad()
+    df = cargar_datos_empleabilidad(COLUMNAS)
 
 # Preprocesamiento
-df = df.dropna(subset=["SECTOR", "FECINGAFI.1"]).copy()
-df.loc[:, "FECINGAFI.1"] = pd.to_datetime(df["FECINGAFI.1"], errors="coerce")
-df = df.sort_values(by=['IdentificacionBanner.1', 'FECINGAFI.1'])
+df = df.dropna(subset=["SECTOR", "FECINGAFI.1"])
+df = df.sort_values(by=['id_persona', 'FECINGAFI.1'])
 
 # Detectar transiciones de sector
-df['sector_anterior'] = df.groupby('IdentificacionBanner.1')['SECTOR'].shift()
+df['sector_anterior'] = df.groupby('id_persona')['SECTOR'].shift()
 df['sector_actual'] = df['SECTOR']
 df = df.dropna(subset=['sector_anterior', 'sector_actual'])
 df = df[df['sector_anterior'] != df['sector_actual']]
@@ -44,7 +51,7 @@ df_fil = df_fil[
 # === Tabla general de transiciones ===
 st.subheader("📌 Tabla de transiciones generales")
 tabla_general = (
-    df_fil.groupby(["sector_anterior", "sector_actual"])
+    df_fil.groupby(["sector_anterior", "sector_actual"], observed=True)
     .size()
     .reset_index(name="Cantidad")
     .rename(
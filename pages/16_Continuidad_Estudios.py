@@ -1,4 +1,5 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 from utils.estilos import aplicar_tema_plotly, mostrar_tarjeta_nota
 from utils.carga_datos import cargar_datos_titulos
@@ -32,7 +33,7 @@ with col1:
     facultad_sel = st.selectbox("Facultad", ["Todas"] + facultades_filtradas, key="facultad_filtro")
 
 # Creamos df_filtrado para aplicar los filtros dinámicos
-df_filtrado = df_base.copy()
+df_filtrado = df_base
 if facultad_sel != "Todas":
     df_filtrado = df_filtrado[df_filtrado["FACULTAD"] == facultad_sel]
 
@@ -59,39 +60,43 @@ pregrado_udla = df_filtrado[
 
 posgrados = df_base[df_base["TIPO_TITULO"] == "Posgrado"]
 
-ids_pregrado = set(pregrado_udla["IDENTIFICACION"])
-ids_posgrado = set(posgrados["IDENTIFICACION"])
-ids_continua = ids_pregrado & ids_posgrado
+def codigos_persona(df):
+    # Códigos enteros distintos y ordenados: las intersecciones se hacen sobre arrays
+    return np.unique(df["ID_PERSONA"].dropna().to_numpy(np.int32))
+
+ids_pregrado = codigos_persona(pregrado_udla)
+ids_posgrado = codigos_persona(posgrados)
+ids_continua = np.intersect1d(ids_pregrado, ids_posgrado, assume_unique=True)
 
 total_pregrado = len(ids_pregrado)
 total_continua = len(ids_continua)
 tasa_cont = round(100 * total_continua / total_pregrado, 1) if total_pregrado else None
 
-ids_posgrado_udla = set(
-    posgrados[posgrados["INSTITUCIÓN DE EDUCACIÓN SUPERIOR"] == udla]["IDENTIFICACION"]
+ids_posgrado_udla = codigos_persona(
+    posgrados[posgrados["INSTITUCIÓN DE EDUCACIÓN SUPERIOR"] == udla]
 )
-ids_recompra = ids_pregrado & ids_posgrado_udla
+ids_recompra = np.intersect1d(ids_pregrado, ids_posgrado_udla, assume_unique=True)
 tasa_recompra = round(100 * len(ids_recompra) / total_continua, 1) if total_continua else None
 
 primer_posgrados = (
-    posgrados[posgrados["IDENTIFICACION"].isin(ids_continua)]
-    .sort_values(["IDENTIFICACION", "FECHA DE REGISTRO"])
-    .groupby("IDENTIFICACION")
+    posgrados[posgrados["ID_PERSONA"].isin(ids_continua)]
+    .sort_values(["ID_PERSONA", "FECHA DE REGISTRO"])
+    .groupby("ID_PERSONA")
     .first()
     .reset_index()
     .rename(columns={"FECHA DE REGISTRO": "FECHA_POSGRADO"})
 )
 
 pregrados_base = (
-    pregrado_udla[pregrado_udla["IDENTIFICACION"].isin(ids_continua)]
-    .sort_values(["IDENTIFICACION", "FECHA DE REGISTRO"])
-    .groupby("IDENTIFICACION")
+    pregrado_udla[pregrado_udla["ID_PERSONA"].isin(ids_continua)]
+    .sort_values(["ID_PERSONA", "FECHA DE REGISTRO"])
+    .groupby("ID_PERSONA")
     .first()
     .reset_index()
     .rename(columns={"FECHA DE REGISTRO": "FECHA_PREGRADO"})
 )
 
-df_tiempos1 = pd.merge(primer_posgrados, pregrados_base, on="IDENTIFICACION")
+df_tiempos1 = pd.merge(primer_posgrados, pregrados_base, on="ID_PERSONA")
 df_tiempos1["FECHA_PREGRADO"] = pd.to_datetime(df_tiempos1["FECHA_PREGRADO"])
 df_tiempos1["FECHA_POSGRADO"] = pd.to_datetime(df_tiempos1["FECHA_POSGRADO"])
 df_tiempos1["TIEMPO_ANIOS"] = (
@@ -101,9 +106,9 @@ df_tiempos1["TIEMPO_ANIOS"] = (
 tiempo_1 = round(df_tiempos1["TIEMPO_ANIOS"].mean(), 1) if not df_tiempos1.empty else None
 
 segundo_posgrados = (
-    posgrados[posgrados["IDENTIFICACION"].isin(ids_continua)]
-    .sort_values(["IDENTIFICACION", "FECHA DE REGISTRO"])
-    .groupby("IDENTIFICACION")
+    posgrados[posgrados["ID_PERSONA"].isin(ids_continua)]
+    .sort_values(["ID_PERSONA", "FECHA DE REGISTRO"])
+    .groupby("ID_PERSONA")
     .nth(1)
     .reset_index()
     .rename(columns={"FECHA DE REGISTRO": "FECHA_2DO_POSGRADO"})
@@ -111,8 +116,8 @@ segundo_posgrados = (
 
 df_tiempos2 = pd.merge(
     segundo_posgrados,
-    primer_posgrados[["IDENTIFICACION", "FECHA_POSGRADO"]],
-    on="IDENTIFICACION",
+    primer_posgrados[["ID_PERSONA", "FECHA_POSGRADO"]],
+    on="ID_PERSONA",
     how="inner"
 )
 df_tiempos2["FECHA_2DO_POSGRADO"] = pd.to_datetime(df_tiempos2["FECHA_2DO_POSGRADO"])
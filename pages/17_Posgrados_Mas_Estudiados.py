@@ -44,17 +44,17 @@ facultades_opciones = ["Todas"] + facultades
 fac_sel = st.selectbox("Facultad de pregrado", facultades_opciones, index=0)
 
 # === 5. Obtener cédulas (Identificacion) de egresados de esa universidad/facultad
-df_filtrado_pregrado = df_pregrado.copy()
+df_filtrado_pregrado = df_pregrado
 if uni_sel != "Todas":
     df_filtrado_pregrado = df_filtrado_pregrado[df_filtrado_pregrado["INSTITUCIÓN DE EDUCACIÓN SUPERIOR"] == uni_sel]
 if fac_sel != "Todas":
     df_filtrado_pregrado = df_filtrado_pregrado[df_filtrado_pregrado["FACULTAD"] == fac_sel]
 
-cedulas_pregrado = df_filtrado_pregrado["IDENTIFICACION"].dropna().unique()
+cedulas_pregrado = df_filtrado_pregrado["ID_PERSONA"].dropna().unique()
 
 # === 6. Buscar sus posgrados (por identificación)
 df_posgrados = df[
-    (df["TIPO_TITULO"] == "Posgrado") & (df["IDENTIFICACION"].isin(cedulas_pregrado))
+    (df["TIPO_TITULO"] == "Posgrado") & (df["ID_PERSONA"].isin(cedulas_pregrado))
 ]
 
 # === 7. Conteo de posgrados
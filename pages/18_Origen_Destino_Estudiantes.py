@@ -31,10 +31,10 @@ df_posgrado_udla = df[
 ]
 
 # === 4. Encontrar universidades de pregrado de esos estudiantes
-ids_posgrado_udla = set(df_posgrado_udla["IDENTIFICACION"])
+ids_posgrado_udla = df_posgrado_udla["ID_PERSONA"].dropna().unique()
 
 df_pregrado = df[
-    (df["TIPO_TITULO"] == "Pregrado") & (df["IDENTIFICACION"].isin(ids_posgrado_udla))
+    (df["TIPO_TITULO"] == "Pregrado") & (df["ID_PERSONA"].isin(ids_posgrado_udla))
 ]
 
 # === 5. Conteo completo y total GLOBAL ------------------------------
@@ -94,13 +94,13 @@ df_pregrado_udla = df[
     (df["TIPO_TITULO"] == "Pregrado")
     & (df["INSTITUCIÓN DE EDUCACIÓN SUPERIOR"] == udla)
 ]
-ids_pregrado_udla = set(df_pregrado_udla["IDENTIFICACION"])
+ids_pregrado_udla = df_pregrado_udla["ID_PERSONA"].dropna().unique()
 
 # 2 Todos sus POSGRADOS (en cualquier universidad) ─ SIN duplicados
 df_posgrados_todos = (
     df[
         (df["TIPO_TITULO"] == "Posgrado")
-        & (df["IDENTIFICACION"].isin(ids_pregrado_udla))
+        & (df["ID_PERSONA"].isin(ids_pregrado_udla))
     ]
     # convertir fecha dentro del subset
     .assign(
@@ -109,7 +109,7 @@ df_posgrados_todos = (
         )
     )
     .sort_values("FECHA_REG")  # cronología real
-    .drop_duplicates("IDENTIFICACION", keep="first")  # primer posgrado
+    .drop_duplicates("ID_PERSONA", keep="first")  # primer posgrado
     .drop(columns="FECHA_REG")  # limpiamos
 )
 
@@ -1,75 +1,58 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from utils.carga_datos import cargar_datos_empleabilidad
+from utils.carga_datos import cargar_datos_empleabilidad, cargar_vistas
 from utils.estilos import aplicar_tema_plotly, mostrar_tarjeta_nota
-from utils.filtros import aplicar_filtros
+from utils.filtros import evaluar_filtros, restricciones, COLUMNAS_FILTROS
+from utils.tasas import tasas_empleo
 
 aplicar_tema_plotly()
 st.title("Tasa de Ocupación Laboral por Cohortes")
 
+# Columnas que usa esta página (se cargan solo estas)
+COLUMNAS = COLUMNAS_FILTROS + [
+    "Esta_empleado",
+]
+
 # 🌀 Cargar datos
 with st.spinner("Cargando datos..."):
-    df_base = cargar_datos_empleabilidad()
-
-# 🏷️ Marcar quién está empleado
-df_base['Esta_empleado'] = df_base['SALARIO.1'].notnull() | df_base['RUCEMP.1'].notnull()
+    df_base = cargar_datos_empleabilidad(COLUMNAS)
 
 # --------------------------
 # 1️⃣ FILTROS (UNA SOLA VEZ)
 # --------------------------
-# Aquí incluimos "Trabajo Formal", para que el usuario seleccione.
-df_filtrado, selecciones = aplicar_filtros(
-    df_base.copy(),
-    incluir=["Nivel", "Oferta Actual", "Facultad", "Carrera", "Trabajo Formal"]
+# Aquí incluimos "Trabajo Formal", para que el usuario seleccione. La misma
+# evaluación da el denominador: todos los filtros excepto "Trabajo Formal".
+mascara, mascara_total, selecciones = evaluar_filtros(
+    df_base,
+    incluir=["Nivel", "Oferta Actual", "Facultad", "Carrera", "Trabajo Formal"],
+    excluir="Trabajo Formal",
 )
 
-tipo_grafico = st.radio("Tipo de gráfico", options=["Líneas", "Barras"], horizontal=True)
-
 # --------------------------
 # 2️⃣ CÁLCULO DE TASA POR COHORTE
 # --------------------------
-if df_filtrado.empty:
-    st.warning("No hay datos disponibles con los filtros seleccionados.")
-else:
-    # 2.1 Numerador: graduados empleados (ya filtrado por Trabajo Formal)
-    df_empleados = df_filtrado[df_filtrado['Esta_empleado']]
-    empleados = (
-        df_empleados
-        .groupby("AnioGraduacion.1")["IdentificacionBanner.1"]
-        .nunique()
+resumen = None
+if mascara.any():
+    # Numerador: graduados empleados (ya filtrado por Trabajo Formal).
+    # Denominador: totales por cohorte con todos los filtros excepto
+    # "Trabajo Formal"
+    resumen = cargar_vistas().consultar(
+        "tasas",
+        ["AnioGraduacion.1"],
+        restricciones(selecciones),
+        filtros_total=restricciones(selecciones, excluir="Trabajo Formal"),
+        respaldo=lambda: tasas_empleo(df_base, ["AnioGraduacion.1"], mascara, mascara_total),
     )
 
-    # 2.2 Denominador: totales por cohorte, aplicando manualmente
-    #      todos los filtros excepto "Trabajo Formal"
-    df_total = df_base.copy()
-    # Nivel
-    if selecciones['Nivel'] != "Todos":
-        df_total = df_total[df_total['regimen.1'] == selecciones['Nivel']]
-    # Oferta Actual
-    if selecciones['Oferta Actual'] != "Todos":
-        df_total = df_total[df_total['Oferta actual'] == selecciones['Oferta Actual']]
-    # Facultad
-    if selecciones['Facultad'] != "Todas":
-        df_total = df_total[df_total['FACULTAD'] == selecciones['Facultad']]
-    # Carrera
-    if selecciones['Carrera'] != "Todas":
-        df_total = df_total[df_total['CarreraHomologada.1'] == selecciones['Carrera']]
-    # (NO filtramos por 'Trabajo Formal' aquí)
-    total = (
-        df_total
-        .groupby("AnioGraduacion.1")["IdentificacionBanner.1"]
-        .nunique()
-    )
 
-    # 2.3 Armar el resumen y calcular la tasa
-    resumen = (
-        pd.DataFrame({'empleados': empleados, 'total': total})
-          .reset_index()
-          .query("total > 0")
-          .assign(tasa=lambda d: d['empleados'] / d['total'])
-          .sort_values('AnioGraduacion.1')
-    )
+@st.fragment
+def mostrar_grafico(resumen):
+    # Cambiar el tipo de gráfico solo vuelve a dibujar este bloque, sin
+    # recalcular filtros ni resumen
+    tipo_grafico = st.radio("Tipo de gráfico", options=["Líneas", "Barras"], horizontal=True)
+    if resumen is None:
+        st.warning("No hay datos disponibles con los filtros seleccionados.")
+        return
 
     # 2.4 Graficar
     titulo = "Tasa de ocupación por cohorte"
@@ -97,6 +80,9 @@ else:
 
     st.plotly_chart(fig, use_container_width=True)
 
+
+mostrar_grafico(resumen)
+
 # --------------------------
 # 3️⃣ NOTA
 # --------------------------
@@ -1,74 +1,57 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from utils.carga_datos import cargar_datos_empleabilidad
+from utils.carga_datos import cargar_datos_empleabilidad, cargar_vistas
 from utils.estilos import aplicar_tema_plotly, mostrar_tarjeta_nota
-from utils.filtros import aplicar_filtros
+from utils.filtros import evaluar_filtros, restricciones, COLUMNAS_FILTROS
+from utils.tasas import tasas_empleo
 
 aplicar_tema_plotly()
 st.title("Riesgo de Desempleo")
 
+# Columnas que usa esta página (se cargan solo estas)
+COLUMNAS = COLUMNAS_FILTROS + [
+    "Esta_empleado",
+]
+
 # 🌀 Cargar datos
 with st.spinner("Cargando datos..."):
-    df_base = cargar_datos_empleabilidad()
-
-# 🏷️ Añadir columna de empleo
-df_base['Esta_empleado'] = df_base['SALARIO.1'].notnull() | df_base['RUCEMP.1'].notnull()
+    df_base = cargar_datos_empleabilidad(COLUMNAS)
 
 # --------------------------
 # 1️⃣ FILTROS (incluye Trabajo Formal, sin Cohorte)
 # --------------------------
-df_filtrado, selecciones = aplicar_filtros(
-    df_base.copy(),
-    incluir=["Nivel", "Oferta Actual", "Facultad", "Carrera", "Trabajo Formal"]
+# La misma evaluación da el denominador (todos los filtros salvo Trabajo Formal)
+mascara, mascara_total, selecciones = evaluar_filtros(
+    df_base,
+    incluir=["Nivel", "Oferta Actual", "Facultad", "Carrera", "Trabajo Formal"],
+    excluir="Trabajo Formal",
 )
 
-tipo_grafico = st.radio("Tipo de gráfico", options=["Líneas", "Barras"], horizontal=True)
-
 # --------------------------
 # 2️⃣ CÁLCULO DE DESEMPLEO
 # --------------------------
-if df_filtrado.empty:
-    st.warning("No hay datos disponibles con los filtros seleccionados.")
-else:
-    # 2.1 Numerador: filtrado por Trabajo Formal y empleo
-    df_empleados = df_filtrado[df_filtrado["Esta_empleado"]]
-
-    # Si se aplicó filtro de "Trabajo Formal", respetarlo aquí
-    if selecciones['Trabajo Formal'] != "Todos":
-        df_empleados = df_empleados[df_empleados["Empleo formal"].astype(str) == selecciones['Trabajo Formal']]
-
-    empleados = (
-        df_empleados
-        .groupby("AnioGraduacion.1")["IdentificacionBanner.1"]
-        .nunique()
+resumen = None
+if mascara.any():
+    # Numerador: filtrado por Trabajo Formal (ya aplicado) y empleo.
+    # Denominador: todos los graduados según filtros, sin Trabajo Formal
+    resumen = cargar_vistas().consultar(
+        "tasas",
+        ["AnioGraduacion.1"],
+        restricciones(selecciones),
+        filtros_total=restricciones(selecciones, excluir="Trabajo Formal"),
+        respaldo=lambda: tasas_empleo(df_base, ["AnioGraduacion.1"], mascara, mascara_total),
     )
+    resumen["desempleo"] = 1 - resumen["tasa"]
 
-    # 2.2 Denominador: todos los graduados según filtros, sin Trabajo Formal
-    df_total = df_base.copy()
-    if selecciones['Nivel'] != "Todos":
-        df_total = df_total[df_total['regimen.1'] == selecciones['Nivel']]
-    if selecciones['Oferta Actual'] != "Todos":
-        df_total = df_total[df_total['Oferta actual'] == selecciones['Oferta Actual']]
-    if selecciones['Facultad'] != "Todas":
-        df_total = df_total[df_total['FACULTAD'] == selecciones['Facultad']]
-    if selecciones['Carrera'] != "Todas":
-        df_total = df_total[df_total['CarreraHomologada.1'] == selecciones['Carrera']]
 
-    total = (
-        df_total
-        .groupby("AnioGraduacion.1")["IdentificacionBanner.1"]
-        .nunique()
-    )
-
-    # 2.3 Construcción del resumen
-    resumen = (
-        pd.DataFrame({'empleados': empleados, 'total': total})
-        .reset_index()
-        .query("total > 0")
-        .assign(desempleo=lambda d: 1 - (d['empleados'] / d['total']))
-        .sort_values('AnioGraduacion.1')
-    )
+@st.fragment
+def mostrar_grafico(resumen):
+    # Cambiar el tipo de gráfico solo vuelve a dibujar este bloque, sin
+    # recalcular filtros ni resumen
+    tipo_grafico = st.radio("Tipo de gráfico", options=["Líneas", "Barras"], horizontal=True)
+    if resumen is None:
+        st.warning("No hay datos disponibles con los filtros seleccionados.")
+        return
 
     titulo = "Tasa de desempleo por cohorte"
 
@@ -97,6 +80,9 @@ else:
 
     st.plotly_chart(fig, use_container_width=True)
 
+
+mostrar_grafico(resumen)
+
 # --------------------------
 # 3️⃣ NOTA
 # --------------------------
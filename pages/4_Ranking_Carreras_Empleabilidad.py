@@ -1,33 +1,37 @@
 import streamlit as st
 import plotly.express as px
-from utils.carga_datos import cargar_datos_empleabilidad
+from utils.carga_datos import cargar_datos_empleabilidad, cargar_vistas
 from utils.estilos import aplicar_tema_plotly, mostrar_tarjeta_nota, PALETA_PASTEL
-from utils.filtros import aplicar_filtros
+from utils.filtros import evaluar_filtros, restricciones, COLUMNAS_FILTROS
+from utils.tasas import tasas_empleo
 
 aplicar_tema_plotly()
 st.title("Ranking de Carreras con más Empleabilidad")
 
+# Columnas que usa esta página (se cargan solo estas)
+COLUMNAS = COLUMNAS_FILTROS + [
+    "Esta_empleado",
+    "Trimestre",
+    "Periodo",
+]
+
 # 🌀 Cargar datos sin procesar
 with st.spinner("Cargando datos..."):
-    df_base = cargar_datos_empleabilidad()
+    df_base = cargar_datos_empleabilidad(COLUMNAS)
 
 # Procesamiento específico
-df = df_base.copy()
-df['Esta_empleado'] = df['SALARIO.1'].notnull() | df['RUCEMP.1'].notnull()
-
-def asignar_quimestre(mes):
-    return {2: 'Q1', 5: 'Q2', 9: 'Q3', 11: 'Q4'}.get(mes, None)
-
-df['Quimestre'] = df['Mes.1'].apply(asignar_quimestre)
-df = df[df['Quimestre'].notnull()]
-df['Periodo'] = df['Anio.1'].astype(str) + ' ' + df['Quimestre']
+df = df_base
+df = df[df['Trimestre'].notnull()]
 
 # --------------------------
 # FILTROS
 # --------------------------
-df_fil, selecciones = aplicar_filtros(
+# Una sola evaluación: filas filtradas y denominador sin "Trabajo Formal"
+# (solo máscaras; las filas filtradas no se copian)
+mascara, mascara_total, selecciones = evaluar_filtros(
     df,
-    incluir=["Nivel", "Oferta Actual", "Facultad", "Cohorte_multi", "Trabajo Formal"]
+    incluir=["Nivel", "Oferta Actual", "Facultad", "Cohorte_multi", "Trabajo Formal"],
+    excluir="Trabajo Formal",
 )
 
 # Obtener cohortes seleccionadas
@@ -40,48 +44,28 @@ else:
 # --------------------------
 # CÁLCULO DE RANKING POR CARRERA Y COHORTE
 # --------------------------
-if df_fil.empty:
+if not mascara.any():
     st.warning("No hay datos disponibles con los filtros seleccionados.")
 else:
     try:
-        cohortes = sorted(int(c) for c in cohortes_seleccionadas) if cohortes_seleccionadas else sorted(df_fil["AnioGraduacion.1"].dropna().unique())
+        cohortes = sorted(int(c) for c in cohortes_seleccionadas) if cohortes_seleccionadas else sorted(df.loc[mascara, "AnioGraduacion.1"].dropna().unique())
     except:
         cohortes = sorted(cohortes_seleccionadas)
 
-    # 1. Denominador: todos los graduados (sin filtro Trabajo Formal)
-    df_total = (
-        df[df["AnioGraduacion.1"].isin(cohortes)]
-        .groupby(["CarreraHomologada.1", "AnioGraduacion.1", "IdentificacionBanner.1"], as_index=False)
-        .agg(total_registro=("IdentificacionBanner.1", "count"))
-    )
-
-    # 2. Numerador: solo empleados con filtro aplicado
-    df_fil_empleados = df_fil[df_fil["Esta_empleado"]]  # ya viene filtrado
-
-    df_empleado = (
-        df_fil_empleados
-        .groupby(["CarreraHomologada.1", "AnioGraduacion.1", "IdentificacionBanner.1"], as_index=False)
-        .agg(esta_empleado=("Esta_empleado", "max"))
-    )
-
-    # 3. Unir y calcular tasa
-    df_merge = df_total.merge(
-        df_empleado,
-        on=["CarreraHomologada.1", "AnioGraduacion.1", "IdentificacionBanner.1"],
-        how="left"
-    )
-    df_merge["esta_empleado"] = df_merge["esta_empleado"].fillna(0)
-
-    resumen = (
-        df_merge
-        .groupby(["CarreraHomologada.1", "AnioGraduacion.1"], as_index=False)
-        .agg(
-            empleados=("esta_empleado", "sum"),
-            total=("IdentificacionBanner.1", "nunique")
-        )
+    # Empleados (con todos los filtros) sobre graduados con todos los filtros
+    # salvo Trabajo Formal, para todas las carreras y cohortes a la vez
+    # (desde las vistas, solo meses con trimestre como las filas de df)
+    grupos = ["CarreraHomologada.1", "AnioGraduacion.1"]
+    con_trimestre = [("Periodo", list(df["Periodo"].cat.categories))]
+    resumen = cargar_vistas().consultar(
+        "tasas",
+        grupos,
+        restricciones(selecciones) + con_trimestre,
+        filtros_total=restricciones(selecciones, excluir="Trabajo Formal") + con_trimestre,
+        respaldo=lambda: tasas_empleo(df, grupos, mascara, mascara_total),
     )
-    resumen = resumen[resumen["total"] > 0]
-    resumen["TasaEmpleabilidad"] = resumen["empleados"] / resumen["total"]
+    resumen = resumen[resumen["AnioGraduacion.1"].isin(cohortes)]
+    resumen = resumen.rename(columns={"tasa": "TasaEmpleabilidad"})
 
     top_n = 10
     colores = PALETA_PASTEL
@@ -90,7 +74,7 @@ else:
         for i, coh in enumerate(cohortes):
             df_c = (
                 resumen[resumen["AnioGraduacion.1"] == coh]
-                .sort_values("TasaEmpleabilidad", ascending=False)
+                .sort_values("TasaEmpleabilidad", ascending=False, kind="stable")
                 .head(top_n)
             )
             fig = px.bar(
@@ -116,7 +100,7 @@ else:
         # Combinado
         resumen_comb = (
             resumen
-            .groupby("CarreraHomologada.1", as_index=False)
+            .groupby("CarreraHomologada.1", as_index=False, observed=True)
             .agg(
                 empleados=("empleados", "sum"),
                 total=("total", "sum")
@@ -126,7 +110,7 @@ else:
         resumen_comb["TasaEmpleabilidad"] = resumen_comb["empleados"] / resumen_comb["total"]
         resumen_comb = (
             resumen_comb
-            .sort_values("TasaEmpleabilidad", ascending=False)
+            .sort_values("TasaEmpleabilidad", ascending=False, kind="stable")
             .head(top_n)
         )
 
@@ -153,7 +137,7 @@ else:
     else:
         ranking = (
             resumen
-            .sort_values("TasaEmpleabilidad", ascending=False)
+            .sort_values("TasaEmpleabilidad", ascending=False, kind="stable")
             .head(top_n)
         )
 
@@ -1,14 +1,21 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
-from dateutil.relativedelta import relativedelta
 from math import ceil
 
 # utilidades propias
-from utils.carga_datos import cargar_datos_empleabilidad
+from utils.carga_datos import cargar_datos_empleabilidad, cargar_vistas
 from utils.estilos import aplicar_tema_plotly, mostrar_tarjeta_nota
-from utils.filtros import aplicar_filtros
+from utils.filtros import evaluar_filtros, restricciones, seleccionar_filas, COLUMNAS_FILTROS
+from utils.primer_empleo import (
+    ANTES_GRADUACION,
+    CLAVE_GRADUADO,
+    DESPUES_GRADUACION,
+    SIN_EMPLEO,
+    tiempos_primer_empleo,
+)
+from utils.supervivencia import datos_supervivencia, fecha_corte, kaplan_meier, medianas
+from utils.vistas import VistaConteos
 
 # ------------------------------------------------------------------
 # AJUSTES ESTÉTICOS
@@ -19,113 +26,73 @@ st.title("Tiempo para el primer empleo")
 # ------------------------------------------------------------------
 # 1. CARGA Y PRE-PROCESAMIENTO
 # ------------------------------------------------------------------
+# Columnas que usa esta página (se cargan solo estas)
+COLUMNAS = COLUMNAS_FILTROS + [
+    "FechaGraduacion.1",
+    "FECINGAFI.1",
+    "Esta_empleado",
+    "Anio.1",
+    "Mes.1",
+]
 with st.spinner("Cargando datos…"):
-    df_base = cargar_datos_empleabilidad()
+    df_base = cargar_datos_empleabilidad(COLUMNAS)
 
-df = df_base.copy()
-df['FechaGraduacion.1'] = pd.to_datetime(df['FechaGraduacion.1'], errors='coerce')
-df['FECINGAFI.1']       = pd.to_datetime(df['FECINGAFI.1'],      errors='coerce')
+# Las fechas ya vienen como datetime desde el esquema de carga
+df = df_base
 
 # ------------------------------------------------------------------
-# 2. FILTRAR A COHORTE 2024
-# ------------------------------------------------------------------
-df_2024_all = df[df['AnioGraduacion.1'] == 2024].copy()
-
+# 2. UN REGISTRO POR GRADUADO (TODAS LAS COHORTES)
 # ------------------------------------------------------------------
-# 3. PREPARAR DATAFRAME POR ESTUDIANTE
-# ------------------------------------------------------------------
-df_students = df_2024_all.drop_duplicates(subset='IdentificacionBanner.1').copy()
-
-mask_emp = (
-    df_2024_all['SALARIO.1'].notnull() |
-    df_2024_all['RUCEMP.1'].notnull()
-)
-df_emp = df_2024_all[mask_emp]\
-    .sort_values(['IdentificacionBanner.1', 'FECINGAFI.1'])
-
-def obtener_fecha_primer_empleo(g):
-    fg = g['FechaGraduacion.1'].iloc[0]
-    post = g[g['FECINGAFI.1'] >= fg]
-    if not post.empty:
-        return post['FECINGAFI.1'].min()
-    prev = g[g['FECINGAFI.1'] < fg]
-    if not prev.empty:
-        return prev['FECINGAFI.1'].max()
-    return pd.NaT
-
-primeras = (
-    df_emp
-    .groupby('IdentificacionBanner.1')
-    .apply(obtener_fecha_primer_empleo)
-    .reset_index(name='FechaIngresoPrimerEmpleo')
-)
-df_students = df_students.merge(primeras, on='IdentificacionBanner.1', how='left')
-
-def calcular_meses(ing, grad):
-    if pd.isna(ing):
-        return np.nan
-    if ing >= grad:
-        d = relativedelta(ing, grad)
-        return d.years * 12 + d.months
-    return 0
-
-df_students['Meses al primer empleo'] = df_students.apply(
-    lambda r: calcular_meses(r['FechaIngresoPrimerEmpleo'], r['FechaGraduacion.1']),
-    axis=1
-)
+# Solo para los filtros: los conteos salen de la matriz cohorte x meses
+# desde la graduación, armada una vez por versión de los datos
+df_students = df.drop_duplicates(subset=CLAVE_GRADUADO)
 
 # ------------------------------------------------------------------
-# 4. APLICAR FILTROS
+# 3. APLICAR FILTROS
 # ------------------------------------------------------------------
-# 4.1 Con Trabajo Formal → para gráfica y métricas parciales
-df_filtrado, selecciones = aplicar_filtros(
+# Con Trabajo Formal → para gráfica y métricas parciales; sin Trabajo
+# Formal da el total
+mascara, mascara_total, selecciones = evaluar_filtros(
     df_students,
-    incluir=["Nivel", "Oferta Actual", "Facultad", "Carrera", "Trabajo Formal"]
+    incluir=["Nivel", "Oferta Actual", "Facultad", "Carrera", "Trabajo Formal"],
+    excluir="Trabajo Formal",
 )
 
-# Fijar cohorte
-cohorte_sel = st.selectbox("Cohorte (Año Graduación)", ["2024"], index=0, disabled=True)
-selecciones["Cohorte"] = cohorte_sel
-
-# 4.2 Calcular total **sin** filtro de Trabajo Formal
-df_base_total = df_students.copy()
-
-# aplicar los otros filtros manualmente
-# nivel → df['regimen.1'], oferta → df['Oferta actual']
-# facultad → df['FACULTAD'], carrera → df['CarreraHomologada.1']
-if selecciones["Nivel"] != "Todos":
-    df_base_total = df_base_total[
-        df_base_total["regimen.1"] == selecciones["Nivel"]
-    ]
-if selecciones["Oferta Actual"] != "Todos":
-    df_base_total = df_base_total[
-        df_base_total["Oferta actual"] == selecciones["Oferta Actual"]
-    ]
-if selecciones["Facultad"] != "Todas":
-    df_base_total = df_base_total[
-        df_base_total["FACULTAD"] == selecciones["Facultad"]
-    ]
-if selecciones["Carrera"] != "Todas":
-    df_base_total = df_base_total[
-        df_base_total["CarreraHomologada.1"] == selecciones["Carrera"]
-    ]
+
+def base_en_crudo(medida):
+    # Un registro por graduado, alineado con df_students
+    tiempos = tiempos_primer_empleo(df)
+    return tiempos if medida == "primer_empleo" else datos_supervivencia(tiempos, fecha_corte(df))
+
+
+def consultar_matriz(grupos, extra, excluir=None, medida="primer_empleo"):
+    """Graduados por `grupos` con los filtros de la barra (salvo `excluir`) y los pares de `extra`."""
+    mascara_filas = mascara if excluir is None else mascara_total
+    columnas = list(dict.fromkeys(list(grupos) + [col for col, _ in extra]))
+    # Desde la matriz; en crudo (resolviendo el primer empleo de las filas) solo si ninguna vista sirve
+    return cargar_vistas().consultar(
+        medida, grupos, restricciones(selecciones, excluir) + extra,
+        respaldo=lambda: VistaConteos(
+            seleccionar_filas(base_en_crudo(medida), mascara_filas), columnas
+        ).consultar(grupos, extra),
+    )
+
 
 # ------------------------------------------------------------------
-# 5. MÉTRICAS
+# 4. MÉTRICAS
 # ------------------------------------------------------------------
-total          = df_base_total.shape[0]
-mask_pregrad   = df_filtrado["FechaIngresoPrimerEmpleo"].notna() & \
-                 (df_filtrado["FechaIngresoPrimerEmpleo"] < df_filtrado["FechaGraduacion.1"])
-mask_postgrad  = df_filtrado["FechaIngresoPrimerEmpleo"].notna() & \
-                 (df_filtrado["FechaIngresoPrimerEmpleo"] >= df_filtrado["FechaGraduacion.1"])
-mask_noemp     = df_filtrado["FechaIngresoPrimerEmpleo"].isna()
 
-pregrad_count  = int(mask_pregrad.sum())
-postgrad_count = int(mask_postgrad.sum())
-sinemp_count   = int(mask_noemp.sum())
+
+def metricas(cohortes):
+    por_cohorte = [("AnioGraduacion.1", cohortes)]
+    total = int(consultar_matriz(["AnioGraduacion.1"], por_cohorte, excluir="Trabajo Formal")["graduados"].sum())
+    por_situacion = consultar_matriz(["Situación"], por_cohorte).set_index("Situación")["graduados"]
+    conteos = {s: int(por_situacion.get(s, 0)) for s in (ANTES_GRADUACION, DESPUES_GRADUACION, SIN_EMPLEO)}
+    return total, conteos
+
 
 # ------------------------------------------------------------------
-# 5.1 TARJETA DE INSIGHT
+# 4.1 TARJETA DE INSIGHT
 # ------------------------------------------------------------------
 
 
@@ -148,23 +115,43 @@ def construir_mensaje_insight(facultad, carrera, mes_top):
         return f"Un egresado consigue su primer empleo formal, en promedio, {mes_frase}"
 
 
-df_plot = df_filtrado[mask_postgrad].copy()
-if not df_plot.empty:
-    df_plot["Meses al primer empleo"] = pd.to_numeric(
-        df_plot["Meses al primer empleo"], errors="coerce"
+def etiqueta_mes(x):
+    return "menos de un mes" if x == 0 else f"{x} mes{'es' if x != 1 else ''}"
+
+
+@st.fragment
+def mostrar_distribucion(cohortes_disponibles):
+    # Elegir cohortes solo vuelve a leer la matriz, sin recalcular filtros ni
+    # primer empleo
+    defecto = [2024] if 2024 in cohortes_disponibles else cohortes_disponibles[-1:]
+    cohortes_sel = st.multiselect(
+        "Cohortes (Año Graduación)", cohortes_disponibles, default=defecto, key="cohortes_primer_empleo"
     )
-    df_plot["MesNum"] = df_plot["Meses al primer empleo"].fillna(0).astype(int)
-    df_plot["MesText"] = df_plot["MesNum"].apply(
-        lambda x: "menos de un mes" if x == 0 else f"{x} mes{'es' if x != 1 else ''}"
+    if not cohortes_sel:
+        st.info("Selecciona al menos una cohorte.")
+        return
+    cohortes_sel = sorted(cohortes_sel)
+    total, conteos = metricas(cohortes_sel)
+
+    # Graduados con empleo post-graduación por cohorte y meses desde la graduación
+    matriz = consultar_matriz(
+        ["AnioGraduacion.1", "Meses al primer empleo"],
+        [("AnioGraduacion.1", cohortes_sel), ("Situación", [DESPUES_GRADUACION])],
     )
+    matriz = matriz[matriz["graduados"] > 0]
+    if matriz.empty:
+        st.warning("No hay datos con empleo post-graduación para los filtros seleccionados.")
+        return
+    matriz = matriz.assign(
+        MesNum=matriz["Meses al primer empleo"].astype(int),
+        Cohorte=matriz["AnioGraduacion.1"].astype(str),
+    )
+    matriz["Mes"] = matriz["MesNum"].apply(etiqueta_mes)
 
-    freq = df_plot["MesText"].value_counts().reset_index()
-    freq.columns = ["Mes", "Cantidad"]
+    # Frecuencia de cada mes en las cohortes elegidas
+    freq = matriz.groupby("Mes", sort=False).agg(Cantidad=("graduados", "sum"), MesNum=("MesNum", "first")).reset_index()
     freq["Cantidad"] = freq["Cantidad"].astype(int)
     freq["Prioridad"] = freq["Mes"].apply(lambda m: 0 if m == "menos de un mes" else 1)
-    freq["MesNum"] = freq["Mes"].apply(
-        lambda m: 0 if m == "menos de un mes" else int(m.split()[0])
-    )
     freq = freq.sort_values(
         by=["Cantidad", "Prioridad", "MesNum"], ascending=[False, True, True]
     )
@@ -192,43 +179,132 @@ if not df_plot.empty:
         unsafe_allow_html=True,
     )
 
-# ------------------------------------------------------------------
-# 6. VISUALIZACIÓN
-# ------------------------------------------------------------------
-if df_plot.empty:
-    st.warning("No hay datos con empleo post-graduación para los filtros seleccionados.")
-else:
-    freq["Porcentaje"] = (freq["Cantidad"] / freq["Cantidad"].sum() * 100).round(2)
-    meses_vals = sorted({int(v) for v in df_plot["MesNum"] if v > 0})
-    etiquetas  = ["menos de un mes"] + [
-        f"{m} mes{'es' if m != 1 else ''}" for m in meses_vals
-    ]
-    freq["Mes"] = pd.Categorical(freq["Mes"], categories=etiquetas, ordered=True)
-    freq = freq.sort_values("Mes")
-
-    fig = px.bar(
-        freq,
-        x="Mes",
-        y="Cantidad",
-        text="Porcentaje",  # 👉 Mostrar porcentaje como texto sobre la barra
-        custom_data=["Porcentaje"],
-        labels={"Mes": "Meses desde la graduación", "Cantidad": "Número de estudiantes"},
-        title="Distribución del Tiempo al Primer Empleo (Cohorte 2024)"
-    )
-    fig.update_traces(
-        texttemplate="%{text}%",  # 👉 Formato del texto en la barra
-        textposition="outside",   # 👉 Posición del texto fuera de la barra
-        hovertemplate=(
-            "Meses desde la graduación: <b>%{x}</b><br>"
-            "Número de estudiantes: %{y}<br>"
-            "Porcentaje: %{customdata[0]}%<extra></extra>"
+    # ------------------------------------------------------------------
+    # 5. VISUALIZACIÓN
+    # ------------------------------------------------------------------
+    meses_vals = sorted({int(v) for v in matriz["MesNum"] if v > 0})
+    etiquetas  = ["menos de un mes"] + [etiqueta_mes(m) for m in meses_vals]
+    titulo_cohortes = ", ".join(str(c) for c in cohortes_sel)
+
+    if len(cohortes_sel) == 1:
+        freq["Porcentaje"] = (freq["Cantidad"] / freq["Cantidad"].sum() * 100).round(2)
+        freq["Mes"] = pd.Categorical(freq["Mes"], categories=etiquetas, ordered=True)
+        freq = freq.sort_values("Mes")
+
+        fig = px.bar(
+            freq,
+            x="Mes",
+            y="Cantidad",
+            text="Porcentaje",  # 👉 Mostrar porcentaje como texto sobre la barra
+            custom_data=["Porcentaje"],
+            labels={"Mes": "Meses desde la graduación", "Cantidad": "Número de estudiantes"},
+            title=f"Distribución del Tiempo al Primer Empleo (Cohorte {titulo_cohortes})"
         )
-    )
-    max_y = freq["Cantidad"].max()
-    step  = 1 if max_y <= 10 else ceil(max_y / 5)
-    fig.update_yaxes(tickmode="linear", dtick=step, tickformat=",d")
-    fig.update_layout(yaxis_title="Número de estudiantes", xaxis_title="Meses desde la graduación")
+        fig.update_traces(
+            texttemplate="%{text}%",  # 👉 Formato del texto en la barra
+            textposition="outside",   # 👉 Posición del texto fuera de la barra
+            hovertemplate=(
+                "Meses desde la graduación: <b>%{x}</b><br>"
+                "Número de estudiantes: %{y}<br>"
+                "Porcentaje: %{customdata[0]}%<extra></extra>"
+            )
+        )
+        max_y = freq["Cantidad"].max()
+        step  = 1 if max_y <= 10 else ceil(max_y / 5)
+        fig.update_yaxes(tickmode="linear", dtick=step, tickformat=",d")
+        fig.update_layout(yaxis_title="Número de estudiantes", xaxis_title="Meses desde la graduación")
+    else:
+        # Varias cohortes: una curva por cohorte, en porcentaje de sus graduados
+        # con empleo post-graduación para que sean comparables
+        curvas = matriz.assign(
+            Porcentaje=(matriz["graduados"] / matriz.groupby("Cohorte")["graduados"].transform("sum") * 100).round(2)
+        ).sort_values(["Cohorte", "MesNum"])
+        fig = px.line(
+            curvas,
+            x="Mes",
+            y="Porcentaje",
+            color="Cohorte",
+            markers=True,
+            custom_data=["graduados"],
+            labels={"Mes": "Meses desde la graduación", "Porcentaje": "% de graduados"},
+            title=f"Distribución del Tiempo al Primer Empleo (Cohortes {titulo_cohortes})",
+            category_orders={"Mes": etiquetas},
+        )
+        fig.update_traces(
+            hovertemplate=(
+                "Meses desde la graduación: <b>%{x}</b><br>"
+                "Porcentaje: %{y}%<br>"
+                "Número de estudiantes: %{customdata[0]}<extra></extra>"
+            )
+        )
+        fig.update_layout(yaxis_title="% de graduados", xaxis_title="Meses desde la graduación")
     st.plotly_chart(fig, use_container_width=True)
+    st.caption(
+        f"{conteos[DESPUES_GRADUACION]:,} graduados con primer empleo después de graduarse, "
+        f"{conteos[ANTES_GRADUACION]:,} antes y {conteos[SIN_EMPLEO]:,} sin empleo registrado "
+        f"(de {total:,} graduados sin filtrar por Trabajo Formal)."
+    )
+
+    # ------------------------------------------------------------------
+    # 6. TIEMPO HASTA EL PRIMER EMPLEO CON GRADUADOS AÚN SIN EMPLEO
+    # ------------------------------------------------------------------
+    # Kaplan–Meier de todas las cohortes a la vez: quien aún no tiene empleo
+    # cuenta hasta el corte de los datos, sin suponer que nunca lo conseguirá
+    st.subheader("Tiempo hasta el primer empleo (incluye graduados aún sin empleo)")
+    conteos = consultar_matriz(
+        ["AnioGraduacion.1", "Evento", "Meses observados"],
+        [("AnioGraduacion.1", cohortes_disponibles)],
+        medida="supervivencia",
+    )
+    curvas = kaplan_meier(conteos, ["AnioGraduacion.1"])
+    if curvas.empty:
+        st.info("No hay graduados observados para los filtros seleccionados.")
+        return
+    curvas["Cohorte"] = curvas["AnioGraduacion.1"].astype(str)
+    curvas["Con empleo"] = ((1 - curvas["supervivencia"]) * 100).round(2)
+    por_cohorte = medianas(curvas, ["AnioGraduacion.1"])
+    por_cohorte["Cohorte"] = por_cohorte["AnioGraduacion.1"].astype(str)
+
+    col_mediana, col_curvas = st.columns(2)
+    with col_mediana:
+        fig = px.line(
+            por_cohorte,
+            x="Cohorte",
+            y="mediana",
+            markers=True,
+            labels={"Cohorte": "Año de graduación", "mediana": "Meses (mediana)"},
+            title="Mediana de meses hasta el primer empleo por cohorte",
+        )
+        fig.update_yaxes(rangemode="tozero", tickformat=",d")
+        st.plotly_chart(fig, use_container_width=True)
+    with col_curvas:
+        fig = px.line(
+            curvas[curvas["AnioGraduacion.1"].isin(cohortes_sel)],
+            x="Meses",
+            y="Con empleo",
+            color="Cohorte",
+            line_shape="hv",
+            custom_data=["en_riesgo"],
+            labels={"Meses": "Meses desde la graduación", "Con empleo": "% con primer empleo"},
+            title="Graduados con primer empleo según meses desde la graduación",
+        )
+        fig.update_traces(
+            hovertemplate=(
+                "Meses desde la graduación: <b>%{x}</b><br>"
+                "Con primer empleo: %{y}%<br>"
+                "Graduados aún observados: %{customdata[0]:,}<extra></extra>"
+            )
+        )
+        fig.update_yaxes(range=[0, 100])
+        st.plotly_chart(fig, use_container_width=True)
+    sin_mediana = por_cohorte.loc[por_cohorte["mediana"].isna(), "Cohorte"].tolist()
+    if sin_mediana:
+        st.caption(
+            "Sin mediana (menos de la mitad ha conseguido empleo hasta el corte): " + ", ".join(sin_mediana) + "."
+        )
+
+
+mostrar_distribucion(sorted(df_students.loc[mascara_total, "AnioGraduacion.1"].dropna().unique().tolist()))
 
 # ------------------------------------------------------------------
 # 7. NOTA EXPLICATIVA
@@ -236,7 +312,8 @@ else:
 mostrar_tarjeta_nota(
     texto_principal="""
     <strong>📌 Nota:</strong><br>
-    Esta visualización muestra cuántos meses, en promedio, pasan desde la graduación hasta que los egresados de la cohorte 2024 consiguen su primer empleo formal registrado.<br/><br/>
-    Se consideran como empleo formal aquellos casos en los que existe una afiliación al IESS, ya sea por contrato laboral o por cuenta propia. 
+    Esta visualización muestra cuántos meses, en promedio, pasan desde la graduación hasta que los egresados de las cohortes seleccionadas consiguen su primer empleo formal registrado.<br/><br/>
+    Se consideran como empleo formal aquellos casos en los que existe una afiliación al IESS, ya sea por contrato laboral o por cuenta propia.<br/><br/>
+    Las curvas de tiempo hasta el primer empleo incluyen a los graduados que aún no lo consiguen: cuentan hasta el último mes con datos, así las cohortes recientes no parecen más lentas solo por haber tenido menos tiempo. La mediana es el mes en que la mitad de la cohorte ya tiene su primer empleo.
     """
 )
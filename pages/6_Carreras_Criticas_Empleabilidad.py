@@ -1,30 +1,31 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-from sklearn.linear_model import LinearRegression
 from utils.carga_datos import cargar_datos_empleabilidad
 from utils.estilos import aplicar_tema_plotly, mostrar_tarjeta_nota
-from utils.filtros import aplicar_filtros
+from utils.filtros import aplicar_filtros, recordar_por_filtros, COLUMNAS_FILTROS
+from utils.pronosticos import SERIES_PRONOSTICO, pronosticar
+from utils.tendencias import alertas, tendencias
 
 import plotly.express as px
+import plotly.graph_objects as go
 
 aplicar_tema_plotly()
 st.title("Carreras en Estado Crítico de Empleabilidad")
 
+# Columnas que usa esta página (se cargan solo estas)
+COLUMNAS = COLUMNAS_FILTROS + [
+    "Esta_empleado",
+    "Trimestre",
+    "Periodo",
+]
+
 # 🌀 Cargar datos sin procesar
 with st.spinner("Cargando datos..."):
-    df_base = cargar_datos_empleabilidad()
+    df_base = cargar_datos_empleabilidad(COLUMNAS)
 
 # Preprocesamiento
-df = df_base.copy()
-df['Esta_empleado'] = df['SALARIO.1'].notnull() | df['RUCEMP.1'].notnull()
-
-def asignar_quimestre(mes):
-    return {2: 'Q1', 5: 'Q2', 9: 'Q3', 11: 'Q4'}.get(mes, None)
-
-df['Quimestre'] = df['Mes.1'].apply(asignar_quimestre)
-df = df[df['Quimestre'].notnull()]
-df['Periodo'] = df['Anio.1'].astype(str) + ' ' + df['Quimestre']
+df = df_base
+df = df[df['Trimestre'].notnull()]
 
 # --------------------------
 # FILTROS INTERDEPENDIENTES
@@ -32,78 +33,142 @@ df['Periodo'] = df['Anio.1'].astype(str) + ' ' + df['Quimestre']
 df_fil, selecciones = aplicar_filtros(df, incluir=["Nivel", "Oferta Actual", "Facultad"])
 
 # --------------------------
-# SLIDER DE UMBRAL (porcentaje)
-# --------------------------
-umbral_pct = st.slider(
-    "Umbral de alerta (% de empleabilidad mínima):",
-    min_value=0, max_value=90, step=5, value=60,
-    format="%d%%"
-)
-umbral = umbral_pct / 100  # Convertir a decimal para el cálculo
-
-# --------------------------
-# CÁLCULO DE ALERTAS
+# TASA POR CARRERA Y PERIODO
 # --------------------------
-resumen = df_fil.groupby(['CarreraHomologada.1', 'Periodo']).agg(
-    empleados=('Esta_empleado', 'sum'),
-    total=('IdentificacionBanner.1', 'nunique')
-).reset_index()
-
-resumen['tasa'] = resumen['empleados'] / resumen['total']
-resumen = resumen[resumen['total'] >= 1]
-
-carreras = []
-
-for carrera, grupo in resumen.groupby('CarreraHomologada.1'):
-    grupo = grupo.sort_values('Periodo')
-    tasas = grupo['tasa'].values
-
-    min_tasa = tasas.min()
-    if len(grupo) >= 2:
-        X = np.arange(len(grupo)).reshape(-1, 1)
-        y = tasas
-        modelo = LinearRegression().fit(X, y)
-        pendiente = modelo.coef_[0]
+def tasa_por_periodo(df, grupos):
+    # La misma tasa alimenta las alertas y el pronóstico
+    resumen = df.groupby(grupos + ['Periodo'], observed=True).agg(
+        empleados=('Esta_empleado', 'sum'),
+        total=('id_persona', 'nunique')
+    ).reset_index()
+
+    resumen['tasa'] = resumen['empleados'] / resumen['total']
+    return resumen[resumen['total'] >= 1]
+
+
+resumen = tasa_por_periodo(df_fil, ['CarreraHomologada.1'])
+
+# Tasa mínima y pendiente de todas las carreras a la vez (no dependen del umbral)
+tendencia = tendencias(resumen, 'CarreraHomologada.1', 'Periodo', 'tasa')
+
+
+@st.fragment
+def mostrar_alertas(tendencia):
+    # Mover el umbral solo vuelve a evaluar las alertas: la tasa mínima y la
+    # pendiente de cada carrera no dependen de él
+    # --------------------------
+    # SLIDER DE UMBRAL (porcentaje)
+    # --------------------------
+    umbral_pct = st.slider(
+        "Umbral de alerta (% de empleabilidad mínima):",
+        min_value=0, max_value=90, step=5, value=60,
+        format="%d%%"
+    )
+    umbral = umbral_pct / 100  # Convertir a decimal para el cálculo
+
+    # --------------------------
+    # CÁLCULO DE ALERTAS
+    # --------------------------
+    # Reglas evaluadas sobre todas las carreras en una sola operación
+    df_alertas = alertas(tendencia, umbral).rename(columns={
+        'CarreraHomologada.1': 'Carrera', 'minimo': 'MinTasa', 'pendiente': 'Pendiente', 'tipo': 'Tipo',
+    })
+
+    # --------------------------
+    # MOSTRAR RESULTADOS
+    # --------------------------
+    if df_alertas.empty:
+        st.info("⚠ No se encontraron carreras críticas con los filtros y umbral actuales.")
     else:
-        pendiente = 0
-
-    alerta_tasa = min_tasa < umbral
-    alerta_trend = pendiente < 0
-
-    if alerta_tasa or alerta_trend:
-        if alerta_tasa and alerta_trend:
-            tipo = "Ambas"
-        elif alerta_tasa:
-            tipo = "Tasa baja"
-        else:
-            tipo = "Tendencia descendente"
-
-        carreras.append({
-            "Carrera": carrera,
-            "MinTasa": min_tasa,
-            "Pendiente": pendiente,
-            "Tipo": tipo
-        })
+        df_alertas = df_alertas.sort_values(by="MinTasa")
 
-# --------------------------
-# MOSTRAR RESULTADOS
-# --------------------------
-if not carreras:
-    st.info("⚠ No se encontraron carreras críticas con los filtros y umbral actuales.")
-else:
-    df_alertas = pd.DataFrame(carreras)
-    df_alertas.sort_values(by="MinTasa", inplace=True)
+        def format_pct(x):
+            return f"{x:.1%}" if pd.notnull(x) else ""
+
+        def style_table(df):
+            return df.style\
+                .format({"MinTasa": format_pct, "Pendiente": "{:.2f}"})\
+                .map(lambda v: 'background-color: #ffe6e6' if isinstance(v, float) and v < umbral else '', subset=['MinTasa'])\
+                .map(lambda v: 'background-color: #fff0cc' if isinstance(v, float) and v < 0 else '', subset=['Pendiente'])
 
-    def format_pct(x):
-        return f"{x:.1%}" if pd.notnull(x) else ""
+        st.dataframe(style_table(df_alertas), use_container_width=True)
 
-    def style_table(df):
-        return df.style\
-            .format({"MinTasa": format_pct, "Pendiente": "{:.2f}"})\
-            .map(lambda v: 'background-color: #ffe6e6' if isinstance(v, float) and v < umbral else '', subset=['MinTasa'])\
-            .map(lambda v: 'background-color: #fff0cc' if isinstance(v, float) and v < 0 else '', subset=['Pendiente'])
 
-    st.dataframe(style_table(df_alertas), use_container_width=True)
+mostrar_alertas(tendencia)
+
+# --------------------------
+# PRONÓSTICO POR CARRERA Y COHORTE
+# --------------------------
+# Todas las series de las carreras filtradas en un solo ajuste, guardado por
+# versión de los datos y filtros; elegir carrera o cohortes no lo repite
+def calcular_pronostico():
+    historico = tasa_por_periodo(df_fil, SERIES_PRONOSTICO)
+    return historico, pronosticar(historico, SERIES_PRONOSTICO, list(df['Periodo'].cat.categories))
+
+
+historico, pronostico = recordar_por_filtros("pronostico", selecciones, calcular_pronostico)
+
+
+@st.fragment
+def mostrar_pronostico(carreras):
+    st.subheader("Pronóstico de empleabilidad")
+    if not carreras:
+        st.info("No hay carreras con los filtros seleccionados.")
+        return
+
+    carrera_sel = st.selectbox("Carrera", carreras, key="pronostico_carrera")
+    obs = historico[historico['CarreraHomologada.1'] == carrera_sel]
+    pron = pronostico[pronostico['CarreraHomologada.1'] == carrera_sel]
+    cohortes = sorted(obs['AnioGraduacion.1'].unique().tolist())
+    cohortes_sel = st.multiselect("Cohortes", cohortes, default=cohortes, key="pronostico_cohortes")
+    if not cohortes_sel:
+        st.info("Selecciona al menos una cohorte.")
+        return
+
+    obs = obs[obs['AnioGraduacion.1'].isin(cohortes_sel)].assign(Serie="Observada")
+    pron = pron[pron['AnioGraduacion.1'].isin(cohortes_sel)].assign(Serie="Pronóstico")
+    # El pronóstico arranca en el último trimestre observado para que la línea sea continua
+    ultimo = obs.sort_values('Periodo').groupby('AnioGraduacion.1').tail(1).assign(Serie="Pronóstico")
+    datos = pd.concat([obs, ultimo, pron], ignore_index=True)
+    datos['Cohorte'] = datos['AnioGraduacion.1'].astype(str)
+    orden_periodos = sorted(datos['Periodo'].unique())
+
+    fig = px.line(
+        datos,
+        x='Periodo',
+        y='tasa',
+        color='Cohorte',
+        line_dash='Serie',
+        markers=True,
+        labels={'Periodo': 'Periodo', 'tasa': 'Tasa de empleo'},
+        title=f"Tasa de empleo observada y pronosticada — {carrera_sel}",
+        category_orders={'Periodo': orden_periodos, 'Cohorte': [str(c) for c in cohortes_sel]},
+    )
+
+    # Banda del 95 % de cada cohorte, con el color de su línea
+    colores = {t.legendgroup.split(',')[0]: t.line.color for t in fig.data}
+    for cohorte, banda in pron.groupby('AnioGraduacion.1'):
+        if banda['superior'].isna().all():
+            continue
+        fig.add_trace(go.Scatter(
+            x=list(banda['Periodo']) + list(banda['Periodo'])[::-1],
+            y=list(banda['superior']) + list(banda['inferior'])[::-1],
+            fill='toself',
+            fillcolor=colores.get(str(cohorte)),
+            opacity=0.15,
+            line=dict(width=0),
+            hoverinfo='skip',
+            showlegend=False,
+        ))
+    fig.update_yaxes(tickformat=".0%", range=[0, 1])
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(
+        "Recta de tendencia ajustada a las tasas trimestrales de cada cohorte; la banda sombreada es el "
+        "intervalo de predicción del 95 % (no se muestra con menos de tres trimestres observados)."
+    )
+
+
+mostrar_pronostico(sorted(df_fil['CarreraHomologada.1'].dropna().unique().tolist()))
 
 # --------------------------
 # NOTA
@@ -125,6 +190,7 @@ mostrar_tarjeta_nota(
     </ul>
     <strong>¿Cómo interpretar esta visualización?</strong><br>
     Una carrera con baja empleabilidad y tendencia negativa requiere atención prioritaria, ya que combina un bajo nivel de inserción laboral con una dinámica que empeora con el tiempo.<br>
-    En cambio, una carrera con baja empleabilidad, pero tendencia positiva podría estar en proceso de recuperación.
+    En cambio, una carrera con baja empleabilidad, pero tendencia positiva podría estar en proceso de recuperación.<br><br>
+    <strong>Pronóstico:</strong> proyecta la tasa de empleo de cada cohorte de la carrera elegida, con los filtros seleccionados y la misma tasa que las alertas, para los próximos trimestres, prolongando su tendencia; la banda indica el rango probable y se ensancha cuanto menos datos hay.
     """
 )
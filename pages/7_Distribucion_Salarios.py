@@ -3,39 +3,39 @@ import plotly.express as px
 import pandas as pd
 from utils.carga_datos import cargar_datos_empleabilidad
 from utils.estilos import aplicar_tema_plotly, mostrar_tarjeta_nota
-from utils.filtros import aplicar_filtros
+from utils.filtros import aplicar_filtros, COLUMNAS_FILTROS
 
 aplicar_tema_plotly()
 st.title("Distribución de Salarios")
 
+# Columnas que usa esta página (se cargan solo estas)
+COLUMNAS = COLUMNAS_FILTROS + [
+    "Anio.1",
+    "SALARIO.1",
+    "Esta_empleado",
+    "Trimestre",
+    "Periodo",
+]
+
 # 🌀 Cargar datos
 with st.spinner("Cargando datos..."):
-    df_base = cargar_datos_empleabilidad()
+    df_base = cargar_datos_empleabilidad(COLUMNAS)
 
 # ----------------------------------------
 # 🚀 PROCESAMIENTO
 # ----------------------------------------
 
-# 1. Asegurar que SALARIO.1 sea numérico
-df_base["SALARIO.1"] = pd.to_numeric(df_base["SALARIO.1"], errors="coerce")
-
-# 2. Marcar si estuvo alguna vez empleado
-df_base["Esta_empleado"] = (
-    df_base["SALARIO.1"].notnull() | df_base["RUCEMP.1"].notnull()
-)
-
-# 3. Mapear Mes.1 → Quimestre y filtrar
-mapa_quimestres = {2: "Q1", 5: "Q2", 9: "Q3", 11: "Q4"}
-df_base["Quimestre"] = df_base["Mes.1"].map(mapa_quimestres)
-df_base = df_base[df_base["Quimestre"].notnull()]
+# 1. SALARIO.1 numérico, Esta_empleado, Trimestre y Periodo vienen del almacén;
+#    nos quedamos con los meses de trimestre
+df_base = df_base[df_base["Trimestre"].notnull()]
 
-# 4. Construir Periodo y quedarnos solo con empleados
-df_base["Periodo"] = df_base["Anio.1"].astype(str) + " " + df_base["Quimestre"]
-df_empleados = df_base[df_base["Esta_empleado"]].copy()
+# 2. Quedarnos solo con empleados
+df_empleados = df_base[df_base["Esta_empleado"]]
 
-# 5. Agrupar por graduado y trimestre, conservando todas las columnas de filtro
+# 3. Agrupar por graduado y trimestre, conservando todas las columnas de filtro
 group_cols = [
-    "IdentificacionBanner.1",
+    "id_persona",
+    "id_graduado",
     "AnioGraduacion.1",
     "regimen.1",
     "Oferta actual",
@@ -43,10 +43,10 @@ group_cols = [
     "CarreraHomologada.1",
     "Empleo formal",
     "Anio.1",
-    "Quimestre",
+    "Trimestre",
     "Periodo",
 ]
-df_quarter = df_empleados.groupby(group_cols, as_index=False)["SALARIO.1"].max()
+df_quarter = df_empleados.groupby(group_cols, as_index=False, observed=True)["SALARIO.1"].max()
 
 # ----------------------------------------
 # FILTROS
@@ -67,7 +67,7 @@ df_fil, selecciones = aplicar_filtros(
 # ORDENAR PERIODOS
 # ----------------------------------------
 orden_qu = {"Q1": 1, "Q2": 2, "Q3": 3, "Q4": 4}
-df_fil["__rank"] = df_fil["Anio.1"].astype(str) + df_fil["Quimestre"].map(
+df_fil["__rank"] = df_fil["Anio.1"].astype(str) + df_fil["Trimestre"].map(
     orden_qu
 ).astype(str).str.zfill(2)
 orden_periodos = df_fil.sort_values("__rank")["Periodo"].drop_duplicates().tolist()
@@ -80,7 +80,7 @@ df_fil["Periodo"] = pd.Categorical(
 # ----------------------------------------
 if not df_fil.empty:
     # calcular promedio de cada trimestre
-    quarter_means = df_fil.groupby("Quimestre")["SALARIO.1"].mean()
+    quarter_means = df_fil.groupby("Trimestre", observed=True)["SALARIO.1"].mean()
     # garantizar Q1–Q4 y sacar la media de esos cuatro promedios
     ordered_qs = ["Q1", "Q2", "Q3", "Q4"]
     values = [quarter_means.get(q, 0) for q in ordered_qs]
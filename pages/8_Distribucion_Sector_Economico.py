@@ -1,31 +1,37 @@
 import streamlit as st
 import plotly.express as px
-from utils.carga_datos import cargar_datos_empleabilidad
+from utils.carga_datos import cargar_datos_empleabilidad, cargar_vistas
 from utils.estilos import aplicar_tema_plotly, mostrar_tarjeta_nota
-from utils.filtros import aplicar_filtros
+from utils.filtros import evaluar_filtros, restricciones, seleccionar_filas, COLUMNAS_FILTROS
+from utils.vistas import contar_por, conteo_ordenado, ultimo_por_graduado
 
 aplicar_tema_plotly()
 st.title("Distribución por Sector Económico")
 
+# Columnas que usa esta página (se cargan solo estas)
+COLUMNAS = COLUMNAS_FILTROS + [
+    "Mes.1",
+    "Esta_empleado",
+    "SECTOR",
+]
+
 # 🌀 Cargar datos sin procesar
 with st.spinner("Cargando datos..."):
-    df_base = cargar_datos_empleabilidad()
+    df_base = cargar_datos_empleabilidad(COLUMNAS)
 
 # Procesamiento específico
-df = df_base.copy()
-df["Esta_empleado"] = df["SALARIO.1"].notnull() | df["RUCEMP.1"].notnull()
+df = df_base
 
 # Filtrar solo empleados con sector y mes válido
 df = df[df["Esta_empleado"] & df["SECTOR"].notnull() & df["Mes.1"].notnull()]
 
 # Tomar el último mes por graduado como referencia
-df = df.sort_values(by=["IdentificacionBanner.1", "Mes.1"], ascending=[True, False])
-df = df.drop_duplicates(subset="IdentificacionBanner.1", keep="first")
+df = ultimo_por_graduado(df, ("Mes.1",))
 
 # --------------------------
 # FILTROS
 # --------------------------
-df_fil, selecciones = aplicar_filtros(
+mascara, _, selecciones = evaluar_filtros(
     df,
     incluir=[
         "Nivel",
@@ -40,11 +46,18 @@ df_fil, selecciones = aplicar_filtros(
 # --------------------------
 # GRÁFICO POR SECTOR
 # --------------------------
-if df_fil.empty:
+if not mascara.any():
     st.warning("No hay datos disponibles con los filtros seleccionados.")
 else:
-    # Calcular cantidad y porcentaje
-    conteo = df_fil["SECTOR"].value_counts().reset_index()
+    # Calcular cantidad y porcentaje, desde la vista agregada por sector (en
+    # crudo solo si ninguna vista sirve para los filtros elegidos)
+    conteo = cargar_vistas().consultar(
+        "sector", ["SECTOR"], restricciones(selecciones),
+        respaldo=lambda: contar_por(seleccionar_filas(df, mascara), ["SECTOR"]),
+    )
+    # SECTOR es categórica: se descartan los sectores sin graduados tras los filtros
+    conteo = conteo_ordenado(conteo, "SECTOR", df["SECTOR"].cat.categories)
+    conteo = conteo[conteo > 0].reset_index()
     conteo.columns = ["Sector Económico", "Cantidad"]
     total = conteo["Cantidad"].sum()
     conteo["PorcentajeTexto"] = (conteo["Cantidad"] / total * 100).round(2).astype(
@@ -1,52 +1,40 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import unicodedata
 from utils.carga_datos import cargar_datos_empleabilidad
 from utils.estilos import aplicar_tema_plotly, mostrar_tarjeta_nota
-from utils.filtros import aplicar_filtros
-
-
-def quitar_acentos(s: str) -> str:
-    return "".join(
-        c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c)
-    )
+from utils.filtros import aplicar_filtros, COLUMNAS_FILTROS
 
 
 aplicar_tema_plotly()
 st.title("Transiciones de Empleo")
 
+# Columnas que usa esta página (se cargan solo estas)
+COLUMNAS = COLUMNAS_FILTROS + [
+    "Mes.1",
+    "SALARIO.1",
+    "Estado formal",
+]
+
 # 🌀 1) Cargar datos
 with st.spinner("Cargando datos..."):
-    df_base = cargar_datos_empleabilidad()
+    df_base = cargar_datos_empleabilidad(COLUMNAS)
 
 # —————————————————————————————
 # 2) Preprocesamiento
 # —————————————————————————————
-df = df_base.copy()
-df["SALARIO.1"] = pd.to_numeric(df["SALARIO.1"], errors="coerce")
+df = df_base
 
 meses_validos = [2, 5, 9, 11]
 df = df[df["Mes.1"].isin(meses_validos)]
 
 df = df.sort_values(
-    ["IdentificacionBanner.1", "Mes.1", "SALARIO.1"], ascending=[True, True, False]
-).drop_duplicates(subset=["IdentificacionBanner.1", "Mes.1"], keep="first")
-
-df["Empleo formal"] = (
-    df["Empleo formal"]
-    .astype(str)
-    .str.strip()
-    .apply(quitar_acentos)
-    .str.upper()
-    .replace({"SIN RELACION DE DEPENDENCIA": "AFILIACION VOLUNTARIA"})
-)
-df["Empleo formal"] = df["Empleo formal"].where(
-    df["Empleo formal"].isin(
-        ["DESCONOCIDO", "AFILIACION VOLUNTARIA", "RELACION DE DEPENDENCIA"]
-    ),
-    "DESCONOCIDO",
-)
+    ["id_persona", "Mes.1", "SALARIO.1"], ascending=[True, True, False]
+).drop_duplicates(subset=["id_persona", "Mes.1"], keep="first")
+
+# "Estado formal" es Empleo formal normalizado sin acentos
+# y reducido a DESCONOCIDO / AFILIACION VOLUNTARIA / RELACION DE DEPENDENCIA
+df["Empleo formal"] = df["Estado formal"].astype(str)
 
 # —————————————————————————————
 # 3) FILTROS (sin Trabajo Formal)
@@ -73,7 +61,7 @@ if df_fil.empty:
     st.warning("No hay datos disponibles con esos filtros.")
 else:
     pivot = df_fil.pivot(
-        index="IdentificacionBanner.1", columns="Mes.1", values="Empleo formal"
+        index="id_persona", columns="Mes.1", values="Empleo formal"
     )[meses_validos].fillna("DESCONOCIDO")
     pivot.columns = ["Feb", "May", "Sep", "Nov"]
 
@@ -86,19 +74,19 @@ else:
             ("May", "Sep", "Q2→Q3"),
             ("Sep", "Nov", "Q3→Q4"),
         ]:
-            temp = pivot[[antes, despues]].copy()
+            temp = pivot[[antes, despues]]
 
             # cambios hacia el estado seleccionado
             cambios = temp[
                 (temp[despues] == seleccion_formal) & (temp[antes] != seleccion_formal)
-            ].copy()
+            ]
             cambios["Trimestre"] = label
             cambios["Desde"] = cambios[antes]
 
             # permanencias en el mismo estado
             perm = temp[
                 (temp[despues] == seleccion_formal) & (temp[antes] == seleccion_formal)
-            ].copy()
+            ]
             perm["Trimestre"] = label
             perm["Desde"] = "PERMANECE"
 
@@ -115,15 +103,15 @@ else:
             ("May", "Sep", "Q2→Q3"),
             ("Sep", "Nov", "Q3→Q4"),
         ]:
-            temp = pivot[[antes, despues]].copy()
+            temp = pivot[[antes, despues]]
 
             # cambios entre diferentes estados
-            cambios = temp[temp[antes] != temp[despues]].copy()
+            cambios = temp[temp[antes] != temp[despues]]
             cambios["Trimestre"] = label
             cambios["Transición"] = cambios[antes] + " → " + cambios[despues]
 
             # permanencias (mismo estado)
-            perm = temp[temp[antes] == temp[despues]].copy()
+            perm = temp[temp[antes] == temp[despues]]
             perm["Trimestre"] = label
             perm["Transición"] = perm[antes] + " → " + perm[despues]
 
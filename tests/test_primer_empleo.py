@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from utils.primer_empleo import (
+    CLAVE_GRADUADO,
+    SIN_EMPLEO,
+    meses_completos,
+    primer_empleo,
+    tiempos_primer_empleo,
+)
+
+
+# Referencias: la lógica fila a fila que reemplazan primer_empleo y meses_completos
+
+def _primer_empleo_referencia(df):
+    def obtener_fecha_primer_empleo(g):
+        fg = g["FechaGraduacion.1"].iloc[0]
+        post = g[g["FECINGAFI.1"] >= fg]
+        if not post.empty:
+            return post["FECINGAFI.1"].min()
+        prev = g[g["FECINGAFI.1"] < fg]
+        if not prev.empty:
+            return prev["FECINGAFI.1"].max()
+        return pd.NaT
+
+    emp = df[df["Esta_empleado"]].sort_values(CLAVE_GRADUADO + ["FECINGAFI.1"])
+    return (
+        emp.groupby(CLAVE_GRADUADO)[["FechaGraduacion.1", "FECINGAFI.1"]]
+        .apply(obtener_fecha_primer_empleo)
+        .reset_index(name="FechaIngresoPrimerEmpleo")
+    )
+
+
+def _meses_referencia(ing, grad):
+    if pd.isna(ing):
+        return np.nan
+    if ing >= grad:
+        d = relativedelta(ing, grad)
+        return d.years * 12 + d.months
+    return 0
+
+
+def _comparar_meses(desde, hasta):
+    desde, hasta = pd.to_datetime(pd.Series(desde)), pd.to_datetime(pd.Series(hasta))
+    esperado = [_meses_referencia(h, d) for d, h in zip(desde, hasta)]
+    np.testing.assert_array_equal(meses_completos(desde, hasta), np.array(esperado, dtype=float))
+
+
+def test_meses_fin_de_mes():
+    # El 31 de enero cumple un mes el último día de febrero, bisiesto o no
+    _comparar_meses(
+        ["2023-01-31", "2024-01-31", "2024-01-31", "2023-01-31", "2024-03-31", "2024-08-31"],
+        ["2023-02-28", "2024-02-29", "2024-02-28", "2023-02-27", "2024-04-30", "2025-02-28"],
+    )
+    assert meses_completos(pd.Series(pd.to_datetime(["2024-01-31"])), pd.to_datetime(["2024-02-29"]))[0] == 1
+    assert meses_completos(pd.Series(pd.to_datetime(["2024-01-31"])), pd.to_datetime(["2024-02-28"]))[0] == 0
+
+
+def test_meses_mismo_dia_con_horas_distintas():
+    _comparar_meses(
+        ["2024-01-15 10:00", "2024-01-15 10:00", "2024-01-15 10:00", "2024-03-31 12:00"],
+        ["2024-02-15 09:00", "2024-02-15 10:00", "2024-02-15 11:00", "2024-04-30 11:59"],
+    )
+
+
+def test_meses_negativos_y_vacios():
+    _comparar_meses(
+        ["2024-05-10", "2024-05-10", "2024-05-10", None],
+        ["2024-05-09", "2023-01-01", None, "2024-05-10"],
+    )
+
+
+def test_meses_aleatorios():
+    rng = np.random.default_rng(0)
+    base = np.datetime64("2019-12-01")
+    dias = rng.integers(0, 2000, size=(2, 3000))
+    # Fines de mes y horas del día, que es donde difieren los cálculos ingenuos
+    desde = pd.Series(base + dias[0].astype("timedelta64[D]"))
+    desde = desde.where(dias[0] % 3 > 0, desde + pd.offsets.MonthEnd(0))
+    hasta = pd.Series(base + dias[1].astype("timedelta64[D]")) + pd.to_timedelta(rng.integers(0, 24, 3000), "h")
+    _comparar_meses(desde, hasta)
+
+
+def _empleos():
+    # A: empleos antes y después de graduarse; B: solo antes; C: sin empleo;
+    # D: dos cohortes, cada una resuelta por separado; E: empleado sin fecha de ingreso
+    filas = [
+        ("A", 2024, "2024-03-15", True, "2023-12-01"),
+        ("A", 2024, "2024-03-15", True, "2024-06-01"),
+        ("A", 2024, "2024-03-15", True, "2024-04-30"),
+        ("B", 2024, "2024-03-15", True, "2023-01-31"),
+        ("B", 2024, "2024-03-15", True, "2022-05-01"),
+        ("C", 2024, "2024-03-15", False, None),
+        ("C", 2024, "2024-03-15", False, None),
+        ("D", 2022, "2022-07-01", True, "2022-07-01"),
+        ("D", 2024, "2024-01-31", True, "2022-07-01"),
+        ("D", 2024, "2024-01-31", True, "2024-02-29"),
+        ("E", 2023, "2023-06-30", True, None),
+    ]
+    df = pd.DataFrame(filas, columns=["id_persona", "AnioGraduacion.1", "FechaGraduacion.1", "Esta_empleado", "FECINGAFI.1"])
+    return df.assign(**{col: pd.to_datetime(df[col]) for col in ["FechaGraduacion.1", "FECINGAFI.1"]})
+
+
+def test_primer_empleo_igual_a_la_referencia():
+    df = _empleos()
+    obtenido = primer_empleo(df).sort_values(CLAVE_GRADUADO).reset_index(drop=True)
+    esperado = _primer_empleo_referencia(df).sort_values(CLAVE_GRADUADO).reset_index(drop=True)
+    pd.testing.assert_frame_equal(obtenido, esperado, check_dtype=False)
+
+
+def test_graduados_sin_empleo():
+    tiempos = tiempos_primer_empleo(_empleos()).set_index(CLAVE_GRADUADO)
+    sin_empleo = tiempos.loc[("C", 2024)]
+    assert pd.isna(sin_empleo["FechaIngresoPrimerEmpleo"])
+    assert np.isnan(sin_empleo["Meses al primer empleo"])
+    assert sin_empleo["Situación"] == SIN_EMPLEO
+    assert tiempos.loc[("A", 2024), "Meses al primer empleo"] == 1
+    assert tiempos.loc[("D", 2024), "Meses al primer empleo"] == 1
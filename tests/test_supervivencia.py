@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from utils.primer_empleo import tiempos_primer_empleo
+from utils.supervivencia import datos_supervivencia, kaplan_meier, medianas
+
+CORTE = pd.Timestamp("2024-11-30")
+
+
+def _graduados():
+    # Cohorte 2024 observada; cohorte 2025 graduada después del corte, con
+    # un graduado que ya trabajaba y otro que aún no
+    return pd.DataFrame({
+        "id_persona": ["A", "B", "C", "D"],
+        "AnioGraduacion.1": [2024, 2024, 2025, 2025],
+        "FechaGraduacion.1": pd.to_datetime(["2024-06-15", "2024-06-15", "2025-01-15", "2025-01-15"]),
+        "Esta_empleado": [True, False, True, False],
+        "FECINGAFI.1": pd.to_datetime(["2024-08-20", None, "2024-12-01", None]),
+    })
+
+
+def test_cohorte_posterior_al_corte_queda_fuera_entera():
+    datos = datos_supervivencia(tiempos_primer_empleo(_graduados()), CORTE)
+    meses = datos.set_index("id_persona")["Meses observados"]
+    evento = datos.set_index("id_persona")["Evento"]
+
+    assert meses["A"] == 2 and evento["A"]
+    assert meses["B"] == 5 and not evento["B"]
+    # Empleados o no, los graduados después del corte no entran en las curvas
+    assert np.isnan(meses["C"]) and np.isnan(meses["D"])
+
+
+def test_kaplan_meier_sin_la_cohorte_posterior():
+    datos = datos_supervivencia(tiempos_primer_empleo(_graduados()), CORTE)
+    conteos = (
+        datos.dropna(subset=["Meses observados"])
+        .groupby(["AnioGraduacion.1", "Evento", "Meses observados"])
+        .size().rename("graduados").reset_index()
+    )
+    curvas = kaplan_meier(conteos, ["AnioGraduacion.1"])
+
+    assert curvas["AnioGraduacion.1"].unique().tolist() == [2024]
+    mes2 = curvas[curvas["Meses"] == 2].iloc[0]
+    assert (mes2["en_riesgo"], mes2["eventos"], mes2["supervivencia"]) == (2, 1, 0.5)
+    assert medianas(curvas, ["AnioGraduacion.1"])["mediana"].tolist() == [2]
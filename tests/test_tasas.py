@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.cubo import CuboGraduados
+from utils.tasas import tasas_empleo
+
+
+def _limpia():
+    # Graduados con atributos fijos en cuatro trimestres; el empleo formal
+    # cambia entre filas y la cohorte 2021 no tiene ningún empleado
+    rng = np.random.default_rng(7)
+    n = 80
+    personas = pd.DataFrame({
+        "id_persona": np.arange(n),
+        "AnioGraduacion.1": rng.choice([2021, 2022, 2023], n),
+        "regimen.1": rng.choice(["GRADO", "POSGRADO"], n),
+        "Oferta actual": rng.choice(["SI", "NO"], n),
+        "FACULTAD": rng.choice(["F1", "F2"], n),
+        "CarreraHomologada.1": rng.choice(["ADMINISTRACION", "CIVIL", "MEDICINA"], n),
+    })
+    df = personas.loc[np.repeat(personas.index, 4)].reset_index(drop=True)
+    df["Periodo"] = np.tile(["2024 Q1", "2024 Q2", "2024 Q3", "2024 Q4"], n)
+    df["Empleo formal"] = rng.choice(
+        ["RELACION DE DEPENDENCIA", "AFILIACION VOLUNTARIA", "DESCONOCIDO", None], len(df)
+    )
+    df["Esta_empleado"] = (rng.random(len(df)) < 0.5) & (df["AnioGraduacion.1"] != 2021)
+    categoricas = ["regimen.1", "Oferta actual", "FACULTAD", "CarreraHomologada.1", "Empleo formal", "Periodo"]
+    return df.astype({col: "category" for col in categoricas})
+
+
+def _mascara(df, filtros):
+    mascara = np.ones(len(df), dtype=bool)
+    for col, valores in filtros:
+        mascara &= df[col].isin(valores).to_numpy()
+    return mascara
+
+
+def _referencia(df, grupos, mascara):
+    # Conteos con groupby: la cohorte sin empleados queda vacía en el numerador
+    total = df[mascara].groupby(grupos, observed=True)["id_persona"].nunique()
+    empleados = df[mascara & df["Esta_empleado"]].groupby(grupos, observed=True)["id_persona"].nunique()
+    return empleados.reindex(total.index), total
+
+
+def _ordenar(resumen, grupos):
+    resumen = resumen.astype({col: object for col in grupos})
+    return resumen.sort_values(grupos).reset_index(drop=True)
+
+
+FILTROS = [
+    [],
+    [("regimen.1", ["GRADO"])],
+    [("FACULTAD", ["F1"]), ("AnioGraduacion.1", [2021, 2023])],
+    [("Empleo formal", ["RELACION DE DEPENDENCIA"]), ("Oferta actual", ["SI"])],
+    [("CarreraHomologada.1", ["MEDICINA"]), ("Periodo", ["2024 Q2", "2024 Q4"])],
+]
+GRUPOS = [["AnioGraduacion.1"], ["CarreraHomologada.1", "Periodo"], ["AnioGraduacion.1", "Empleo formal"]]
+
+
+@pytest.mark.parametrize("filtros", FILTROS)
+@pytest.mark.parametrize("grupos", GRUPOS)
+def test_cubo_igual_a_las_filas_filtradas(filtros, grupos):
+    df = _limpia()
+    mascara = _mascara(df, filtros)
+    filas = tasas_empleo(df, grupos, mascara)
+    cubo = CuboGraduados(df).tasas(grupos, filtros)
+    pd.testing.assert_frame_equal(_ordenar(cubo, grupos), _ordenar(filas, grupos), check_dtype=False)
+
+    empleados, total = _referencia(df, grupos, mascara)
+    assert filas["total"].tolist() == total.tolist()
+    assert filas["empleados"].tolist() == empleados.fillna(0).tolist()
+
+
+def test_denominador_con_otros_filtros():
+    # Como las páginas 3 y 4: el numerador con "Trabajo Formal", el total sin él
+    df = _limpia()
+    filtros_total = [("regimen.1", ["POSGRADO"])]
+    filtros = filtros_total + [("Empleo formal", ["AFILIACION VOLUNTARIA"])]
+    grupos = ["AnioGraduacion.1", "CarreraHomologada.1"]
+    filas = tasas_empleo(
+        df, grupos, _mascara(df, filtros), _mascara(df, filtros_total), total_por=["AnioGraduacion.1"]
+    )
+    cubo = CuboGraduados(df).tasas(grupos, filtros, filtros_total, total_por=["AnioGraduacion.1"])
+    pd.testing.assert_frame_equal(_ordenar(cubo, grupos), _ordenar(filas, grupos), check_dtype=False)
+
+
+def test_celdas_sin_empleados_dan_tasa_cero():
+    df = _limpia()
+    cubo = CuboGraduados(df).tasas(["AnioGraduacion.1"], [])
+    empleados, _ = _referencia(df, ["AnioGraduacion.1"], np.ones(len(df), dtype=bool))
+    # Con groupby la cohorte 2021 no tiene numerador (NaN); aquí su tasa es 0
+    assert np.isnan(empleados[2021])
+    sin_empleo = cubo[cubo["AnioGraduacion.1"] == 2021].iloc[0]
+    assert sin_empleo["empleados"] == 0 and sin_empleo["total"] > 0 and sin_empleo["tasa"] == 0
+
+
+def test_seleccion_vacia():
+    df = _limpia()
+    filtros = [("FACULTAD", ["F1"]), ("FACULTAD", ["F2"])]
+    assert CuboGraduados(df).tasas(["AnioGraduacion.1"], filtros).empty
+    assert tasas_empleo(df, ["AnioGraduacion.1"], _mascara(df, filtros)).empty
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+from pandas.api.types import infer_dtype
+
+# Carpeta con las copias en Parquet de cada hoja del libro (junto a data/)
+RUTA_CACHE = Path(__file__).resolve().parent.parent / "data" / ".cache"
+
+
+def _hash_archivo(ruta: Path) -> str:
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+# Hash de cada libro ya calculado en este proceso: ruta -> (tamaño, mtime_ns, sha256).
+# Evita releer el libro en cada carga cuando no se puede escribir el manifiesto.
+_HUELLAS = {}
+
+
+def _ruta_manifiesto(ruta: Path) -> Path:
+    return RUTA_CACHE / f"{ruta.stem}.json"
+
+
+def version_libro(ruta: Path) -> str:
+    """Devuelve el hash del libro, recalculándolo solo si cambió su tamaño o fecha."""
+    stat = ruta.stat()
+    en_memoria = _HUELLAS.get(str(ruta))
+    if en_memoria is not None and en_memoria[:2] == (stat.st_size, stat.st_mtime_ns):
+        return en_memoria[2]
+
+    manifiesto = _ruta_manifiesto(ruta)
+    try:
+        previo = json.loads(manifiesto.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        previo = {}
+
+    if previo.get("tamano") == stat.st_size and previo.get("mtime_ns") == stat.st_mtime_ns:
+        _HUELLAS[str(ruta)] = (stat.st_size, stat.st_mtime_ns, previo["sha256"])
+        return previo["sha256"]
+
+    huella = {
+        "tamano": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": _hash_archivo(ruta),
+    }
+    _HUELLAS[str(ruta)] = (stat.st_size, stat.st_mtime_ns, huella["sha256"])
+    try:
+        RUTA_CACHE.mkdir(parents=True, exist_ok=True)
+        manifiesto.write_text(json.dumps(huella), encoding="utf-8")
+    except OSError:
+        pass  # sin permisos de escritura: el hash queda solo en memoria (_HUELLAS)
+    return huella["sha256"]
+
+
+def _ruta_parquet(ruta: Path, hoja: str, version: str) -> Path:
+    return RUTA_CACHE / f"{ruta.stem}__{hoja}__{version}.parquet"
+
+
+def _normalizar_para_parquet(df: pd.DataFrame) -> pd.DataFrame:
+    # Parquet exige un tipo por columna: las columnas de Excel con números y
+    # textos mezclados se guardan como texto (los vacíos se mantienen nulos)
+    mixtas = [
+        col for col in df.columns
+        if df[col].dtype == object and infer_dtype(df[col], skipna=True).startswith("mixed")
+    ]
+    if not mixtas:
+        return df
+    df = df.copy()
+    for col in mixtas:
+        df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+
+def _guardar_parquet(df: pd.DataFrame, destino: Path):
+    temporal = destino.with_suffix(f".{os.getpid()}.tmp")
+    df.to_parquet(temporal, index=False)
+    os.replace(temporal, destino)  # escritura atómica: nunca se lee un archivo a medias
+
+
+def _limpiar_obsoletos(ruta: Path, hoja: str, vigente: Path):
+    for archivo in RUTA_CACHE.glob(f"{ruta.stem}__{hoja}__*.parquet"):
+        if archivo != vigente:
+            archivo.unlink(missing_ok=True)
+
+
+def asegurar_hojas(ruta: Path, hojas, preparar=None, version_preparacion=0):
+    """Garantiza que cada hoja del libro tenga su copia vigente en Parquet.
+
+    Devuelve la ruta del Parquet de cada hoja y los DataFrames de las hojas que
+    hubo que parsear (así no se vuelven a leer del disco). Las hojas sin copia
+    vigente se parsean juntas abriendo el Excel una sola vez, y sus Parquet se
+    escriben en paralelo. `preparar` asocia a cada hoja una función que se
+    aplica antes de guardarla; `version_preparacion` debe cambiar cuando esas
+    funciones cambian, para descartar las copias previas.
+    """
+    preparar = preparar or {}
+    version = f"{version_libro(ruta)[:16]}_v{version_preparacion}"
+    destinos = {hoja: _ruta_parquet(ruta, hoja, version) for hoja in hojas}
+    faltantes = [hoja for hoja in hojas if not destinos[hoja].exists()]
+    if not faltantes:
+        return destinos, {}
+
+    # openpyxl no permite leer hojas en paralelo, pero con una sola
+    # apertura el zip y la tabla de cadenas compartidas se decodifican una vez
+    crudas = pd.read_excel(ruta, sheet_name=faltantes)
+    parseadas = {}
+    for hoja in faltantes:
+        df = _normalizar_para_parquet(crudas[hoja])
+        parseadas[hoja] = preparar[hoja](df) if hoja in preparar else df
+    try:
+        RUTA_CACHE.mkdir(parents=True, exist_ok=True)
+        # pyarrow libera el GIL, así que las hojas se codifican a la vez
+        with ThreadPoolExecutor(max_workers=len(faltantes)) as ejecutor:
+            list(ejecutor.map(lambda h: _guardar_parquet(parseadas[h], destinos[h]), faltantes))
+        for hoja in faltantes:
+            _limpiar_obsoletos(ruta, hoja, destinos[hoja])
+    except (OSError, ValueError, TypeError):
+        pass  # la caché es una optimización: si no se puede escribir, se usa el Excel
+    return destinos, parseadas
+
+
+def columnas_parquet(destino: Path) -> list:
+    """Nombres de las columnas guardadas, sin leer los datos."""
+    return pq.read_schema(destino).names
+
+
+def leer_columnas(destino: Path, columnas=None) -> pd.DataFrame:
+    """Lee del Parquet solo las columnas pedidas (todas si `columnas` es None)."""
+    return pd.read_parquet(destino, columns=columnas)
@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def tamano_bytes(valor):
+    """Memoria aproximada de un resultado: arrays, DataFrames y tuplas/listas/dicts de ellos.
+
+    Se calcula una vez, al guardar el resultado. Para DataFrames y Series
+    cuenta también el contenido de las columnas de texto, no solo sus punteros.
+    """
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return int(np.sum(valor.memory_usage(index=True, deep=True)))
+    if isinstance(valor, (tuple, list)):
+        return sum(tamano_bytes(v) for v in valor)
+    if isinstance(valor, dict):
+        return sum(tamano_bytes(v) for v in valor.values())
+    if hasattr(valor, "tamano_bytes"):
+        return valor.tamano_bytes()
+    return 64
+
+
+class CacheLRU:
+    """Caché LRU con tope de memoria, segura entre hilos (y por tanto entre sesiones).
+
+    Al superar `max_bytes` descarta los resultados usados hace más tiempo; un
+    resultado que por sí solo supera el tope no se guarda.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._datos = OrderedDict()  # clave -> (valor, bytes)
+        self._bytes = 0
+        self._candado = threading.Lock()
+
+    def recordar(self, clave, calcular):
+        """Devuelve el resultado guardado para `clave` o lo calcula y lo guarda."""
+        with self._candado:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                return self._datos[clave][0]
+        valor = calcular()
+        tamano = tamano_bytes(valor)
+        if tamano > self.max_bytes:
+            return valor
+        with self._candado:
+            if clave in self._datos:
+                self._bytes -= self._datos.pop(clave)[1]
+            self._datos[clave] = (valor, tamano)
+            self._bytes += tamano
+            while self._bytes > self.max_bytes:
+                _, (_, liberado) = self._datos.popitem(last=False)
+                self._bytes -= liberado
+        return valor
+
+    def uso(self):
+        """(entradas, bytes) guardados."""
+        with self._candado:
+            return len(self._datos), self._bytes
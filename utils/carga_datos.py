@@ -1,32 +1,265 @@
+import logging
+import threading
 from pathlib import Path
 import pandas as pd
 import streamlit as st
 
-def cargar_datos_empleabilidad():
-    if 'df_empleabilidad' not in st.session_state:
-        # Ruta basada en el archivo app.py, que es el punto de entrada
-        ruta_proyecto = Path(__file__).resolve().parent.parent  # sube dos niveles desde utils/
-        ruta_archivo = ruta_proyecto / "data" / "empleabilidad.xlsx"
+from utils.cache_columnar import asegurar_hojas, columnas_parquet, leer_columnas, version_libro
+from utils.enriquecimiento import (
+    COLUMNAS_GRADUADO,
+    DERIVADAS_LIMPIA,
+    codificar_identificaciones,
+    dimension_graduados,
+    indice_identificaciones,
+    resolver_dependencias,
+)
+from utils.cubo import DIMENSIONES_CUBO, CuboGraduados
+from utils.esquema import ESQUEMA_LIMPIA, VERSION_ESQUEMA, aplicar_esquema
+from utils.indice_filtros import IndiceFiltros
+from utils.vistas import COLUMNAS_VISTAS, construir_vistas
 
-        if not ruta_archivo.exists():
-            st.error(f"No se encontró el archivo: {ruta_archivo}")
-            st.stop()
+logger = logging.getLogger(__name__)
 
-        df = pd.read_excel(ruta_archivo, sheet_name="Limpia")
-        st.session_state.df_empleabilidad = df
+# Copy-on-Write: los DataFrames que reciben las páginas comparten los arrays
+# del almacén y solo copian una columna cuando la página la modifica, así que
+# ninguna página puede alterar los datos que ve otra. En pandas >= 3 está
+# activado siempre.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
-    return st.session_state.df_empleabilidad
+# Hojas que se materializan juntas en cada carga del libro
+HOJAS = ("Limpia", "Titulos")
 
-def cargar_datos_titulos():
-    if "df_titulos" not in st.session_state:
-        ruta_proyecto = Path(__file__).resolve().parent.parent
-        ruta_archivo = ruta_proyecto / "data" / "empleabilidad.xlsx"
+# Conversión de tipos aplicada al parsear el Excel (queda guardada en el Parquet)
+PREPARAR_HOJAS = {
+    "Limpia": lambda df: aplicar_esquema(df, ESQUEMA_LIMPIA, "Limpia"),
+}
+
+# Columnas derivadas que se calculan una vez por versión y se piden como las demás
+DERIVADAS_HOJAS = {
+    "Limpia": DERIVADAS_LIMPIA,
+}
+
+# Identificación de la persona en cada hoja y columna con su código int32. El
+# código sale de un único índice para todas las hojas, así que una persona
+# tiene el mismo código en "Limpia" y en "Titulos".
+CLAVES_PERSONA = {
+    "Limpia": ("IdentificacionBanner.1", "id_persona"),
+    "Titulos": ("IDENTIFICACION", "ID_PERSONA"),
+}
+
+
+class AlmacenDatos:
+    """Hojas del libro compartidas por todas las sesiones del proceso.
+
+    Cada hoja se guarda con las columnas que alguna página ya pidió; las que
+    faltan se leen del Parquet solo cuando se necesitan, y las derivadas
+    (DERIVADAS_HOJAS y CLAVES_PERSONA) se calculan una única vez por versión
+    del libro.
+    """
+
+    def __init__(self):
+        self._version = None
+        self._parquet = {}   # hoja -> ruta de su copia en Parquet
+        self._columnas = {}  # hoja -> todas sus columnas, en el orden del Excel
+        self._hojas = {}     # hoja -> DataFrame con las columnas cargadas hasta ahora
+        self._graduados = (None, None, None)  # (versión, dimensión de graduados, su índice)
+        self._cubo = (None, None)             # (versión, cubo de graduados distintos)
+        self._vistas = (None, None)           # (versión, enrutador de vistas materializadas)
+        self._indice_personas = None    # identificaciones de todas las hojas
+        self._derivadas = {hoja: dict(DERIVADAS_HOJAS.get(hoja, {})) for hoja in HOJAS}
+        for hoja, (origen, codigo) in CLAVES_PERSONA.items():
+            self._derivadas[hoja][codigo] = (
+                [origen], lambda df, origen=origen: codificar_identificaciones(df[origen], self._personas())
+            )
+        self._candado_carga = threading.Lock()  # serializa la carga del libro
+        self._candado_version = threading.Lock()
+        # Uno por estructura derivada: su construcción pide columnas con
+        # obtener, que toma _candado_carga, y las vistas piden el cubo
+        self._candado_graduados = threading.Lock()
+        self._candado_cubo = threading.Lock()
+        self._candado_vistas = threading.Lock()
+
+    def _version_libro(self, ruta):
+        # Evita que varias sesiones en frío calculen el hash del libro a la vez
+        with self._candado_version:
+            return version_libro(ruta)
+
+    def _actualizar(self, ruta, version):
+        # Un solo paso por el Excel deja listas todas las hojas; las columnas
+        # de las hojas ya parseadas quedan en memoria sin releer el Parquet
+        destinos, parseadas = asegurar_hojas(ruta, HOJAS, PREPARAR_HOJAS, VERSION_ESQUEMA)
+        self._parquet = destinos
+        self._columnas = {
+            hoja: list(parseadas[hoja].columns) if hoja in parseadas else columnas_parquet(destinos[hoja])
+            for hoja in HOJAS
+        }
+        # Reemplaza la versión anterior para que la memoria no crezca con cada cambio del Excel
+        self._hojas = dict(parseadas)
+        self._indice_personas = None
+        self._version = version
+
+    def _columna(self, hoja, col):
+        df = self._hojas.get(hoja)
+        if df is not None and col in df.columns:
+            return df[col]
+        return leer_columnas(self._parquet[hoja], [col])[col]
+
+    def _personas(self):
+        # Se llama dentro de obtener, con _candado_carga ya tomado
+        if self._indice_personas is None:
+            self._indice_personas = indice_identificaciones(
+                *(self._columna(hoja, origen) for hoja, (origen, _) in CLAVES_PERSONA.items())
+            )
+        return self._indice_personas
+
+    def _todas(self, hoja):
+        # Columnas del Excel más las derivadas de la hoja
+        return self._columnas[hoja] + list(self._derivadas[hoja])
+
+    def _disponible(self, hoja, columnas):
+        df = self._hojas.get(hoja)
+        if df is None or not set(columnas) <= set(df.columns):
+            return None
+        return df if list(df.columns) == columnas else df[columnas]
+
+    def obtener(self, ruta, hoja, columnas=None):
+        version = self._version_libro(ruta)
+        if self._version == version:
+            df = self._disponible(hoja, list(columnas or self._todas(hoja)))
+            if df is not None:
+                return df
+
+        # Solo una sesión parsea el libro o lee columnas nuevas; las demás
+        # esperan aquí (bajo su st.spinner) y reutilizan el resultado
+        with self._candado_carga:
+            if self._version != version:
+                self._actualizar(ruta, version)
+            pedidas = list(columnas or self._todas(hoja))
+            df = self._hojas.get(hoja)
+            cargadas = set() if df is None else set(df.columns)
+            faltantes, derivadas = resolver_dependencias(
+                pedidas, self._derivadas[hoja], cargadas
+            )
+            if faltantes or derivadas:
+                # Se publica un DataFrame nuevo: las vistas ya entregadas no cambian
+                if faltantes:
+                    leidas = leer_columnas(self._parquet[hoja], faltantes)
+                    df = leidas if df is None else pd.concat([df, leidas], axis=1)
+                else:
+                    df = df.copy(deep=False)
+                for col in derivadas:
+                    df[col] = self._derivadas[hoja][col][1](df)
+                self._hojas[hoja] = df
+                logger.info(
+                    "Hoja %s: %d columnas leídas del Parquet y %d derivadas (%.1f MB en memoria compartida)",
+                    hoja, len(faltantes), len(derivadas), self.uso_memoria()[hoja] / 2**20,
+                )
+            return self._disponible(hoja, pedidas)
+
+    def graduados(self, ruta):
+        """Dimensión de graduados de "Limpia" y su índice de filtros, una vez por versión."""
+        version = self._version_libro(ruta)
+        version_dim, dim, indice = self._graduados
+        if version_dim == version:
+            return dim, indice
+        # Varias sesiones en frío: una construye y las demás reutilizan
+        with self._candado_graduados:
+            version_dim, dim, indice = self._graduados
+            if version_dim != version:
+                dim = dimension_graduados(
+                    self.obtener(ruta, "Limpia", ["id_graduado", "id_persona"] + COLUMNAS_GRADUADO)
+                )
+                indice = IndiceFiltros(dim, personas="id_persona")
+                self._graduados = (version, dim, indice)
+            return dim, indice
 
-        if not ruta_archivo.exists():
-            st.error(f"No se encontró el archivo: {ruta_archivo}")
-            st.stop()
+    def cubo(self, ruta):
+        """Cubo de graduados distintos de "Limpia", una vez por versión."""
+        version = self._version_libro(ruta)
+        version_cubo, cubo = self._cubo
+        if version_cubo == version:
+            return cubo
+        with self._candado_cubo:
+            version_cubo, cubo = self._cubo
+            if version_cubo != version:
+                cubo = CuboGraduados(
+                    self.obtener(ruta, "Limpia", DIMENSIONES_CUBO + ["id_persona", "Esta_empleado"])
+                )
+                self._cubo = (version, cubo)
+                logger.info("Cubo de graduados: %d celdas (%.1f MB)", len(cubo), cubo.tamano_bytes() / 2**20)
+            return cubo
 
-        df = pd.read_excel(ruta_archivo, sheet_name="Titulos")
-        st.session_state.df_titulos = df
+    def vistas(self, ruta):
+        """Vistas agregadas de "Limpia" y su enrutador; se rehacen al cambiar la versión."""
+        version = self._version_libro(ruta)
+        version_vistas, enrutador = self._vistas
+        if version_vistas == version:
+            return enrutador
+        with self._candado_vistas:
+            version_vistas, enrutador = self._vistas
+            if version_vistas != version:
+                enrutador = construir_vistas(self.obtener(ruta, "Limpia", COLUMNAS_VISTAS), self.cubo(ruta))
+                self._vistas = (version, enrutador)
+                logger.info("Vistas materializadas: %s combinaciones por medida", enrutador.tamano())
+            return enrutador
 
-    return st.session_state.df_titulos
+    def version_datos(self, ruta):
+        """Identificador de los datos servidos: hash del libro y versión del esquema."""
+        return f"{self._version_libro(ruta)[:16]}_v{VERSION_ESQUEMA}"
+
+    def uso_memoria(self):
+        """Bytes ocupados por cada hoja cargada."""
+        return {hoja: int(df.memory_usage(deep=True).sum()) for hoja, df in list(self._hojas.items())}
+
+
+@st.cache_resource(show_spinner=False)
+def _almacen():
+    # Un único almacén por proceso, sin importar cuántas sesiones haya abiertas
+    return AlmacenDatos()
+
+
+def _ruta_libro():
+    # Ruta basada en el archivo app.py, que es el punto de entrada
+    ruta_proyecto = Path(__file__).resolve().parent.parent  # sube dos niveles desde utils/
+    ruta_archivo = ruta_proyecto / "data" / "empleabilidad.xlsx"
+
+    if not ruta_archivo.exists():
+        st.error(f"No se encontró el archivo: {ruta_archivo}")
+        st.stop()
+
+    return ruta_archivo
+
+def version_datos():
+    """Cambia cuando cambia el Excel o el esquema; sirve de clave para cachés derivadas."""
+    return _almacen().version_datos(_ruta_libro())
+
+def uso_memoria_datos():
+    """Memoria (en bytes) que ocupan los datos compartidos, por hoja."""
+    return _almacen().uso_memoria()
+
+def cargar_datos_empleabilidad(columnas=None):
+    """Hoja "Limpia". Con `columnas` se entrega solo ese subconjunto (en ese orden)."""
+    # Vista copy-on-write: no copia nada hasta que la página escribe una columna,
+    # y las columnas que agregue no se ven desde otras sesiones
+    return _almacen().obtener(_ruta_libro(), "Limpia", columnas).copy(deep=False)
+
+def cargar_graduados():
+    """Dimensión de graduados (una fila por `id_graduado`)."""
+    # El spinner solo aparece si hay que construirla (tarda más de medio segundo)
+    with st.spinner("Preparando datos..."):
+        return _almacen().graduados(_ruta_libro())[0]
+
+def cargar_indice_filtros():
+    """Índice de bitmaps de la dimensión de graduados que usan los filtros."""
+    with st.spinner("Preparando datos..."):
+        return _almacen().graduados(_ruta_libro())[1]
+
+def cargar_vistas():
+    """Enrutador de las vistas agregadas (tasas, sector, tamaño, cargos, empresas, primer empleo, supervivencia)."""
+    with st.spinner("Preparando datos..."):
+        return _almacen().vistas(_ruta_libro())
+
+def cargar_datos_titulos():
+    """Hoja "Titulos" completa, con el código de persona en "ID_PERSONA"."""
+    return _almacen().obtener(_ruta_libro(), "Titulos").copy(deep=False)
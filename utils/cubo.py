@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from utils.indice_filtros import codigos_persona, valores_como_texto
+from utils.tasas import resumir_tasas
+
+# Dimensiones del cubo: atributos del graduado, estado formal del mes y periodo
+DIMENSIONES_CUBO = [
+    "AnioGraduacion.1",
+    "regimen.1",
+    "Oferta actual",
+    "FACULTAD",
+    "CarreraHomologada.1",
+    "Empleo formal",
+    "Periodo",
+]
+
+# "Trabajo Formal" se elige por el texto del valor (ver filtros._mascaras_formal)
+DIMENSIONES_TEXTO = {"Empleo formal"}
+
+
+class CuboGraduados:
+    """Graduados distintos por cada combinación de DIMENSIONES_CUBO.
+
+    Cada celda (combinación presente en los datos) guarda los códigos de
+    persona que caen en ella, ordenados y sin repetir, y si cada una tuvo
+    empleo en alguna de sus filas. Cualquier filtro o agregación se responde
+    uniendo las personas de las celdas elegidas, así que el costo depende del
+    tamaño del cubo y no del número de filas mensuales. Con pocas personas por
+    celda, la lista de códigos ocupa menos que un bitmap de todas las personas.
+    """
+
+    def __init__(self, df, dimensiones=DIMENSIONES_CUBO, personas="id_persona"):
+        self.dimensiones = list(dimensiones)
+        self._valores = {}
+        codigos = []
+        for col in self.dimensiones:
+            if col in DIMENSIONES_TEXTO:
+                por_fila, textos = valores_como_texto(df[col])
+                valores, por_texto = np.unique(textos, return_inverse=True)
+                c = np.append(por_texto, -1)[por_fila]
+                valores = pd.Index(valores)
+            else:
+                c, valores = pd.factorize(df[col], sort=True)
+            self._valores[col] = valores
+            codigos.append(c + 1)  # 0 = vacío
+        tamanos = [len(self._valores[col]) + 1 for col in self.dimensiones]
+
+        # Pares (celda, persona) distintos, ordenados por celda y persona
+        persona = codigos_persona(df, personas)
+        validas = persona >= 0
+        celda = np.ravel_multi_index([c[validas] for c in codigos], tamanos)
+        base = int(persona.max()) + 1 if validas.any() else 1
+        pares = celda * base + persona[validas]
+        unicos, inverso = np.unique(pares, return_inverse=True)
+        empleado = np.zeros(len(unicos), dtype=bool)
+        np.logical_or.at(empleado, inverso, df["Esta_empleado"].to_numpy(dtype=bool, na_value=False)[validas])
+
+        claves, inicio = np.unique(unicos // base, return_index=True)
+        self._celdas = np.stack(np.unravel_index(claves, tamanos), axis=1).astype(np.int32)
+        self._inicio = np.append(inicio, len(unicos))
+        self._personas = (unicos % base).astype(np.int32)
+        self._empleado = empleado
+
+    def __len__(self):
+        return len(self._celdas)
+
+    def valores(self, col):
+        return list(self._valores[col])
+
+    def tamano_bytes(self):
+        return self._celdas.nbytes + self._inicio.nbytes + self._personas.nbytes + self._empleado.nbytes
+
+    def _seleccion(self, filtros):
+        # Celdas que cumplen todas las restricciones (col, valores)
+        elegidas = np.ones(len(self._celdas), dtype=bool)
+        for col, valores in filtros:
+            i = self.dimensiones.index(col)
+            codigos = [k + 1 for k, v in enumerate(self._valores[col]) if v in valores]
+            elegidas &= np.isin(self._celdas[:, i], codigos)
+        return elegidas
+
+    def _entradas(self, celdas):
+        # Posiciones de las entradas (persona de una celda) de `celdas`
+        largos = self._inicio[celdas + 1] - self._inicio[celdas]
+        desde = np.repeat(self._inicio[celdas] - np.cumsum(largos) + largos, largos)
+        return desde + np.arange(largos.sum()), np.repeat(np.arange(len(celdas)), largos)
+
+    def tasas(self, grupos, filtros, filtros_total=None, total_por=None):
+        """Lo mismo que `tasas_empleo`, con filtros dados como pares (columna, valores).
+
+        `filtros` define el numerador y `filtros_total` (por defecto los
+        mismos) el denominador.
+        """
+        grupos = list(grupos)
+        en_num = self._seleccion(filtros)
+        en_total = en_num if filtros_total is None else self._seleccion(filtros_total)
+        celdas = np.flatnonzero(en_num | en_total)
+        entradas, de_celda = self._entradas(celdas)
+        codigos = [self._celdas[celdas, self.dimensiones.index(col)][de_celda] - 1 for col in grupos]
+        return resumir_tasas(
+            grupos,
+            codigos,
+            [self._valores[col] for col in grupos],
+            self._personas[entradas],
+            self._empleado[entradas] & en_num[celdas][de_celda],
+            en_total[celdas][de_celda],
+            total_por,
+        )
+
+    # Interfaz común de las vistas (ver vistas.Enrutador)
+    consultar = tasas
@@ -0,0 +1,161 @@
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Meses observados en cada trimestre del año de seguimiento
+MAPA_TRIMESTRES = {2: "Q1", 5: "Q2", 9: "Q3", 11: "Q4"}
+
+# Estados laborales válidos tras normalizar "Empleo formal"
+ESTADOS_FORMALES = ["DESCONOCIDO", "AFILIACION VOLUNTARIA", "RELACION DE DEPENDENCIA"]
+
+# Tamaño de empresa por cantidad de empleados: cada etiqueta llega hasta su límite
+TAMANOS_EMPRESA = ["Microempresa (1–10)", "Pequeña (11–50)", "Mediana (51–200)", "Grande (200+)"]
+LIMITES_TAMANO = [-np.inf, 10, 50, 200, np.inf]
+
+# Atributos fijos de cada graduado: se repiten en todas sus filas mensuales y
+# forman la dimensión de graduados (una fila por graduado)
+COLUMNAS_GRADUADO = [
+    "IdentificacionBanner.1",
+    "Estudiante.1",
+    "regimen.1",
+    "Oferta actual",
+    "FACULTAD",
+    "CarreraHomologada.1",
+    "AnioGraduacion.1",
+    "FechaGraduacion.1",
+]
+
+
+def quitar_acentos(s: str) -> str:
+    return "".join(
+        c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c)
+    )
+
+
+def _mapear_categorias(serie: pd.Series, funcion, valor_nulo=None) -> pd.Series:
+    # Aplica `funcion` a cada categoría distinta (no a cada fila) y reconstruye
+    # la columna a partir de los códigos; los vacíos toman `valor_nulo`
+    serie = serie.astype("category")
+    nuevas = [funcion(c) for c in serie.cat.categories] + [valor_nulo]
+    categorias = sorted({v for v in nuevas if v is not None})
+    posicion = {c: i for i, c in enumerate(categorias)}
+    traduccion = np.array([posicion.get(v, -1) for v in nuevas], dtype=np.int32)
+    # El código -1 (vacío) indexa el último elemento, que es `valor_nulo`
+    codigos = traduccion[serie.cat.codes.to_numpy()]
+    return pd.Series(
+        pd.Categorical.from_codes(codigos, categories=categorias), index=serie.index
+    )
+
+
+def rellenar_vacios(serie: pd.Series, valor) -> pd.Series:
+    """Columna categórica `serie` con los vacíos como `valor` (agregado a las categorías si falta)."""
+    if valor not in serie.cat.categories:
+        serie = serie.cat.add_categories(valor)
+    return serie.fillna(valor)
+
+
+def _esta_empleado(df):
+    return df["SALARIO.1"].notnull() | df["RUCEMP.1"].notnull()
+
+
+def _id_graduado(df):
+    # Clave entera de la dimensión: numera las combinaciones distintas de
+    # atributos fijos en orden de aparición (0, 1, 2, ...)
+    return df.groupby(COLUMNAS_GRADUADO, dropna=False, observed=True, sort=False).ngroup().astype("int32")
+
+
+def _trimestre(df):
+    tipo = pd.CategoricalDtype(list(MAPA_TRIMESTRES.values()), ordered=True)
+    return df["Mes.1"].map(MAPA_TRIMESTRES).astype(tipo)
+
+
+def _periodo(df):
+    periodo = df["Anio.1"].astype(str) + " " + df["Trimestre"].astype(str)
+    periodo = periodo.where(df["Trimestre"].notnull())
+    # Formato "2024 Q1": el orden alfabético coincide con el cronológico
+    return periodo.astype(pd.CategoricalDtype(sorted(periodo.dropna().unique()), ordered=True))
+
+
+def _tamano_empresa(df):
+    # Vacía donde no hay cantidad de empleados
+    return pd.cut(pd.to_numeric(df["Cantidad de empleados"], errors="coerce"), LIMITES_TAMANO, labels=TAMANOS_EMPRESA)
+
+
+def _empleo_formal_normalizado(df):
+    # Solo espacios y mayúsculas: es la etiqueta que ven las páginas, con sus acentos
+    return _mapear_categorias(df["Empleo formal"], lambda v: str(v).strip().upper())
+
+
+def _estado_formal(df):
+    def clasificar(v):
+        v = quitar_acentos(v)
+        v = "AFILIACION VOLUNTARIA" if v == "SIN RELACION DE DEPENDENCIA" else v
+        return v if v in ESTADOS_FORMALES else "DESCONOCIDO"
+
+    return _mapear_categorias(df["Empleo formal normalizado"], clasificar, "DESCONOCIDO")
+
+
+# Columnas derivadas de "Limpia": nombre -> (columnas de las que depende, cálculo).
+# El almacén las calcula una vez por versión de los datos y todas las páginas
+# las piden como cualquier otra columna.
+DERIVADAS_LIMPIA = {
+    "id_graduado": (COLUMNAS_GRADUADO, _id_graduado),
+    "Esta_empleado": (["SALARIO.1", "RUCEMP.1"], _esta_empleado),
+    "Trimestre": (["Mes.1"], _trimestre),
+    "Periodo": (["Anio.1", "Trimestre"], _periodo),
+    "Empleo formal normalizado": (["Empleo formal"], _empleo_formal_normalizado),
+    "Estado formal": (["Empleo formal normalizado"], _estado_formal),
+    "Tamaño Empresa": (["Cantidad de empleados"], _tamano_empresa),
+}
+
+
+def indice_identificaciones(*series):
+    """Índice ordenado con las identificaciones distintas de todas las series."""
+    valores = pd.Index(pd.concat([s.dropna() for s in series], ignore_index=True).unique())
+    try:
+        return valores.sort_values()
+    except TypeError:
+        # Números y textos mezclados (cédulas escritas de las dos formas)
+        return valores.sort_values(key=lambda i: i.astype(str))
+
+
+def codificar_identificaciones(serie: pd.Series, indice: pd.Index) -> pd.Series:
+    """Código int32 de cada identificación según su posición en `indice`."""
+    codigos = indice.get_indexer(serie).astype(np.int32)
+    if (codigos < 0).any():
+        # Identificaciones vacías: el código queda nulo
+        return pd.Series(pd.arrays.IntegerArray(codigos, codigos < 0), index=serie.index)
+    return pd.Series(codigos, index=serie.index)
+
+
+def dimension_graduados(df):
+    """Una fila por graduado con sus atributos fijos, indexada por `id_graduado`.
+
+    `df` trae `id_graduado` y las columnas fijas que debe tener la dimensión.
+    """
+    # Con ngroup(sort=False) la primera aparición de cada clave sigue el orden 0, 1, 2...
+    return df.drop_duplicates("id_graduado").set_index("id_graduado")
+
+
+def resolver_dependencias(columnas, derivadas, disponibles=()):
+    """Separa `columnas` en las que se leen del disco y las derivadas a calcular.
+
+    Las derivadas se devuelven en un orden en que sus dependencias ya existen.
+    Las columnas de `disponibles` (ya cargadas) no se vuelven a pedir.
+    """
+    base, calculadas = [], []
+
+    def visitar(col):
+        if col in base or col in calculadas or col in disponibles:
+            return
+        if col in derivadas:
+            for dependencia in derivadas[col][0]:
+                visitar(dependencia)
+            calculadas.append(col)
+        else:
+            base.append(col)
+
+    for col in columnas:
+        visitar(col)
+    return base, calculadas
@@ -0,0 +1,52 @@
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Cambiar este número cada vez que se modifique un esquema: invalida las
+# copias en Parquet guardadas con los tipos anteriores
+VERSION_ESQUEMA = 1
+
+# Tipos declarados para la hoja "Limpia". Las dimensiones se repiten en cada
+# fila mensual, así que como categorías ocupan un código por fila en lugar de
+# un texto; los años y meses caben en enteros pequeños (admiten vacíos).
+ESQUEMA_LIMPIA = {
+    "regimen.1": "category",
+    "Oferta actual": "category",
+    "FACULTAD": "category",
+    "CarreraHomologada.1": "category",
+    "Empleo formal": "category",
+    "SECTOR": "category",
+    "NOMEMP.1": "category",
+    "OCUAFI.1": "category",
+    "Anio.1": "Int16",
+    "Mes.1": "Int8",
+    "AnioGraduacion.1": "Int16",
+    "FECINGAFI.1": "datetime",
+    "FechaGraduacion.1": "datetime",
+    "SALARIO.1": "float64",
+}
+
+
+def _convertir(serie: pd.Series, tipo: str) -> pd.Series:
+    if tipo == "category":
+        return serie.astype("category")
+    if tipo == "datetime":
+        return pd.to_datetime(serie, errors="coerce")
+    return pd.to_numeric(serie, errors="coerce").astype(tipo)
+
+
+def aplicar_esquema(df: pd.DataFrame, esquema: dict, nombre: str = "") -> pd.DataFrame:
+    """Convierte las columnas declaradas en `esquema` y registra la memoria antes y después."""
+    antes = df.memory_usage(deep=True).sum()
+    df = df.copy()
+    for col, tipo in esquema.items():
+        if col in df.columns:
+            df[col] = _convertir(df[col], tipo)
+    despues = df.memory_usage(deep=True).sum()
+    logger.info(
+        "Esquema aplicado a %s: %.1f MB -> %.1f MB (%.0f%% menos)",
+        nombre or "la hoja", antes / 2**20, despues / 2**20, 100 * (1 - despues / max(antes, 1)),
+    )
+    return df
@@ -1,4 +1,25 @@
+import os
+
+import numpy as np
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from utils.cache_lru import CacheLRU
+from utils.carga_datos import cargar_indice_filtros, version_datos
+from utils.indice_filtros import Cascada, IndiceFiltros, codigos_persona, contar_distintos, valores_como_texto
+
+# Columnas de "Limpia" que usa aplicar_filtros; las páginas las incluyen al
+# pedir sus columnas a cargar_datos_empleabilidad
+COLUMNAS_FILTROS = [
+    "id_graduado",
+    "id_persona",
+    "regimen.1",
+    "Oferta actual",
+    "FACULTAD",
+    "CarreraHomologada.1",
+    "AnioGraduacion.1",
+    "Empleo formal",
+]
 
 def inicializar_filtros():
     if 'filtros' not in st.session_state:
@@ -9,21 +30,29 @@ def inicializar_filtros():
             'Carrera': "Todas",
             'Cohorte': "Todos",
             'Cohorte_multi': [],
-            'Trabajo Formal': "Todos"
+            'Trabajo Formal': "Todos",
+            'Por lote': False
         }
 
-def filtro_selectbox(label, opciones, clave, todas_label="Todos"):
+def _con_conteo(conteos):
+    # Muestra junto a cada opción los graduados distintos que le corresponden
+    if not conteos:
+        return str
+    return lambda v: f"{v} ({conteos[v]:,})" if v in conteos else str(v)
+
+def filtro_selectbox(label, opciones, clave, todas_label="Todos", conteos=None):
     opciones_full = [todas_label] + opciones
     valor_inicial = st.session_state.filtros.get(clave, todas_label)
     if valor_inicial not in opciones_full:
         valor_inicial = todas_label
     seleccion = st.selectbox(label, opciones_full,
                              index=opciones_full.index(valor_inicial),
+                             format_func=_con_conteo(conteos),
                              key=f"filtro_{clave}")
     st.session_state.filtros[clave] = seleccion
     return seleccion
 
-def filtro_multiselect(label, opciones, clave, max_selecciones=3, min_selecciones=1):
+def filtro_multiselect(label, opciones, clave, max_selecciones=3, min_selecciones=1, conteos=None):
     """Filtro multiselect con validaciones de máximo y mínimo de selecciones."""
     # Obtener las opciones disponibles como strings
     opciones = sorted([str(opcion) for opcion in opciones])
@@ -60,6 +89,7 @@ def filtro_multiselect(label, opciones, clave, max_selecciones=3, min_seleccione
         label,
         opciones,
         default=valor_inicial,
+        format_func=_con_conteo(conteos),
         key=f"filtro_{clave}_multi",
         max_selections=max_selecciones
     )
@@ -72,55 +102,221 @@ def filtro_multiselect(label, opciones, clave, max_selecciones=3, min_seleccione
     st.session_state.filtros[f"{clave}_multi"] = seleccion
     return seleccion
 
-def aplicar_filtros(df, incluir=None):
-    """Aplica solo los filtros especificados en `incluir` (lista de strings)."""
+# Memoria máxima (en MB) por defecto de la caché de resultados de filtros
+# compartida por todas las sesiones; al llenarse se descartan los resultados
+# menos usados. Se cambia con la variable de entorno CACHE_FILTROS_MB o con
+# `cache_filtros_mb` en .streamlit/secrets.toml
+MAX_MB_CACHE_FILTROS = 256
+
+
+def _max_mb_cache_filtros():
+    valor = os.environ.get("CACHE_FILTROS_MB")
+    if valor is None:
+        try:
+            valor = st.secrets.get("cache_filtros_mb")
+        except FileNotFoundError:  # sin secrets.toml
+            valor = None
+    return MAX_MB_CACHE_FILTROS if valor in (None, "") else float(valor)
+
+# Filtros sobre atributos fijos del graduado: (etiqueta, columna, texto de "todos")
+FILTROS_GRADUADO = {
+    'Nivel': ("Nivel", "regimen.1", "Todos"),
+    'Oferta Actual': ("Oferta Actual", "Oferta actual", "Todos"),
+    'Facultad': ("Facultad", "FACULTAD", "Todas"),
+    'Carrera': ("Carrera", "CarreraHomologada.1", "Todas"),
+}
+
+def seleccionar_filas(df, mascara):
+    """Filas de `df` donde `mascara` es verdadera (sin copiar si lo es en todas)."""
+    return df if mascara.all() else df[mascara]
+
+@st.cache_resource(show_spinner=False)
+def _cache_resultados():
+    # Una sola caché por proceso, compartida por todas las sesiones
+    return CacheLRU(int(_max_mb_cache_filtros() * 2**20))
+
+def recordar_por_filtros(nombre, selecciones, calcular):
+    """Resultado de `calcular` guardado en la caché de filtros por versión de los datos y `selecciones`."""
+    filtros = tuple((col, tuple(valores)) for col, valores in restricciones(selecciones))
+    return _cache_resultados().recordar((nombre, version_datos(), filtros), calcular)
+
+def uso_cache_filtros():
+    """(entradas, bytes) de la caché de resultados de filtros."""
+    return _cache_resultados().uso()
+
+def _identidad_entrada(df, incluir, excluir):
+    # Cada página prepara siempre la misma entrada para una versión de los
+    # datos (no hay widgets antes de los filtros), así que la página, los
+    # filtros que dibuja y la forma del DataFrame la identifican
+    ctx = get_script_run_ctx()
+    pagina = ctx.page_script_hash if ctx else ""
+    return (version_datos(), pagina, tuple(incluir), excluir, len(df), tuple(df.columns))
+
+def _solo_lectura(*arrays):
+    # Los resultados cacheados se comparten entre sesiones
+    for a in arrays:
+        a.flags.writeable = False
+    return arrays
+
+def _mascaras_formal(df, mascara, mascara_sin_excluir):
+    # Opciones y conteos de "Trabajo Formal" sobre las filas que dejaron los
+    # demás filtros (cambia mes a mes, así que se resuelve por fila y se
+    # compara el texto solo una vez por valor distinto)
+    codigos, textos = valores_como_texto(df['Empleo formal'])
+    opciones, por_texto = np.unique(textos, return_inverse=True)
+    codigos = np.append(por_texto, -1)[codigos].astype(np.int32)  # un código por texto; -1 = vacío
+    presentes = np.bincount(codigos[mascara & (codigos >= 0)], minlength=len(opciones)) > 0
+    conteo = contar_distintos(codigos[mascara], codigos_persona(df, "id_persona")[mascara], len(opciones))
+    return {
+        "codigos": codigos,
+        "opciones": list(opciones[presentes]),
+        "conteos": dict(zip(opciones, conteo)),
+        "textos": list(opciones),
+        "mascaras": (mascara, mascara_sin_excluir),
+    }
+
+def _filtros_por_lote():
+    # Preferencia guardada con los demás filtros, así se mantiene entre páginas
+    por_lote = st.toggle(
+        "Aplicar filtros con un botón",
+        value=st.session_state.filtros.get('Por lote', False),
+        key="filtro_Por lote",
+        help="Permite cambiar varios filtros y recalcular la página una sola vez.",
+    )
+    st.session_state.filtros['Por lote'] = por_lote
+    return por_lote
+
+def evaluar_filtros(df, incluir=None, excluir=None):
+    """Dibuja los filtros de `incluir` y los evalúa en una sola pasada.
+
+    Devuelve (mascara, mascara_sin_excluir, selecciones), con máscaras
+    booleanas sobre las filas de `df`: la primera aplica todos los filtros y
+    la segunda todos menos `excluir` (por ejemplo, el denominador de una tasa
+    con "todos los filtros salvo Trabajo Formal").
+    """
+    return _evaluar_en_panel(df, incluir, excluir)[:3]
+
+def _evaluar_en_panel(df, incluir, excluir):
     inicializar_filtros()
+    if not _filtros_por_lote():
+        return _evaluar_filtros(df, incluir, excluir)
+
+    # Por lote: los cambios quedan pendientes dentro del formulario y la página
+    # se recalcula una vez al aplicarlos; las opciones en cascada se actualizan
+    # con las selecciones aplicadas
+    with st.form("form_filtros", border=False):
+        resultado = _evaluar_filtros(df, incluir, excluir)
+        st.form_submit_button("Aplicar filtros")
+    return resultado
+
+def _evaluar_filtros(df, incluir, excluir):
     selecciones = {}
 
     incluir = incluir or ['Nivel', 'Oferta Actual', 'Facultad', 'Carrera', 'Cohorte', 'Cohorte_multi', 'Trabajo Formal']
 
-    if 'Nivel' in incluir:
-        nivel_sel = filtro_selectbox("Nivel", sorted(df['regimen.1'].dropna().unique()), "Nivel", "Todos")
-        df = df if nivel_sel == "Todos" else df[df['regimen.1'] == nivel_sel]
-        selecciones['Nivel'] = nivel_sel
+    # Los resultados se guardan por (datos, entrada de la página, selecciones)
+    # en una caché LRU compartida: repetir una combinación no recalcula nada
+    cache = _cache_resultados()
+    entrada = _identidad_entrada(df, incluir, excluir)
 
-    if 'Oferta Actual' in incluir:
-        oferta_sel = filtro_selectbox("Oferta Actual", sorted(df['Oferta actual'].dropna().unique()), "Oferta Actual", "Todos")
-        df = df if oferta_sel == "Todos" else df[df['Oferta actual'] == oferta_sel]
-        selecciones['Oferta Actual'] = oferta_sel
+    # Los atributos fijos del graduado se resuelven con el índice de bitmaps de
+    # la dimensión de graduados (o uno armado sobre `df` si no trae la clave,
+    # guardado en la caché con la misma identidad de entrada para que su
+    # cascada sobreviva a las reejecuciones); las filas de `df` se seleccionan
+    # una sola vez, al final
+    if "id_graduado" in df.columns:
+        indice, posiciones = cargar_indice_filtros(), df["id_graduado"].to_numpy()
+    else:
+        indice = cache.recordar(("indice", entrada), lambda: IndiceFiltros(df, personas="id_persona"))
+        posiciones = np.arange(len(df))
+    cascada = Cascada(indice, cache.recordar(("presentes", entrada), lambda: indice.presentes(posiciones)))
+    sin_excluir = cascada.bitmap
 
-    if 'Facultad' in incluir:
-        facultad_sel = filtro_selectbox("Facultad", sorted(df['FACULTAD'].dropna().unique()), "Facultad", "Todas")
-        df = df if facultad_sel == "Todas" else df[df['FACULTAD'] == facultad_sel]
-        selecciones['Facultad'] = facultad_sel
+    def filtrar(filtro, col, valores):
+        nonlocal sin_excluir
+        cascada.filtrar(col, valores)
+        if filtro != excluir:
+            sin_excluir = indice.filtrar(sin_excluir, col, valores)
 
-    if 'Carrera' in incluir:
-        carrera_sel = filtro_selectbox("Carrera", sorted(df['CarreraHomologada.1'].dropna().unique()), "Carrera", "Todas")
-        df = df if carrera_sel == "Todas" else df[df['CarreraHomologada.1'] == carrera_sel]
-        selecciones['Carrera'] = carrera_sel
+    for filtro, (label, col, todas_label) in FILTROS_GRADUADO.items():
+        if filtro in incluir:
+            seleccion = filtro_selectbox(label, cascada.opciones(col), filtro, todas_label, cascada.conteos(col))
+            if seleccion != todas_label:
+                filtrar(filtro, col, [seleccion])
+            selecciones[filtro] = seleccion
 
     if 'Cohorte' in incluir:
-        cohortes_disponibles = sorted(df['AnioGraduacion.1'].dropna().unique())
+        cohortes_disponibles = cascada.opciones("AnioGraduacion.1")
         cohortes_filtradas = [c for c in cohortes_disponibles if str(c) != '2025']
-        cohorte_sel = filtro_selectbox("Cohorte (Año Graduación)", cohortes_filtradas, "Cohorte", "Todos")
-        df = df if cohorte_sel == "Todos" else df[df['AnioGraduacion.1'] == cohorte_sel]
+        cohorte_sel = filtro_selectbox("Cohorte (Año Graduación)", cohortes_filtradas, "Cohorte", "Todos",
+                                       cascada.conteos("AnioGraduacion.1"))
+        if cohorte_sel != "Todos":
+            filtrar('Cohorte', "AnioGraduacion.1", [cohorte_sel])
         selecciones['Cohorte'] = cohorte_sel
 
     if 'Cohorte_multi' in incluir:
         cohorte_multi_sel = filtro_multiselect(
             "Cohorte (Año Graduación) - Múltiples",
-            sorted(df['AnioGraduacion.1'].dropna().unique()),
+            cascada.opciones("AnioGraduacion.1"),
             "Cohorte_multi",
             max_selecciones=3,
-            min_selecciones=1
+            min_selecciones=1,
+            conteos={str(c): n for c, n in cascada.conteos("AnioGraduacion.1").items()},
         )
         if cohorte_multi_sel:  # Solo filtrar si hay selección
-            df = df[df['AnioGraduacion.1'].astype(str).isin(cohorte_multi_sel)]
+            elegidas = [c for c in indice.valores("AnioGraduacion.1") if str(c) in cohorte_multi_sel]
+            filtrar('Cohorte_multi', "AnioGraduacion.1", elegidas)
             selecciones['Cohorte_multi'] = cohorte_multi_sel
 
-    if 'Trabajo Formal' in incluir:
-        formal_sel = filtro_selectbox("Trabajo Formal", sorted(df['Empleo formal'].dropna().astype(str).unique()), "Trabajo Formal", "Todos")
-        df = df if formal_sel == "Todos" else df[df['Empleo formal'].astype(str) == formal_sel]
-        selecciones['Trabajo Formal'] = formal_sel
+    def mascaras_graduado():
+        return _solo_lectura(indice.mascara(cascada.bitmap, posiciones), indice.mascara(sin_excluir, posiciones))
 
-    return df, selecciones
+    clave = (entrada, cascada.ruta)
+    if 'Trabajo Formal' not in incluir:
+        mascara, mascara_sin_excluir = cache.recordar(("mascaras",) + clave, mascaras_graduado)
+        return mascara, mascara_sin_excluir, selecciones, clave
+
+    formal = cache.recordar(("formal",) + clave, lambda: _mascaras_formal(df, *mascaras_graduado()))
+    formal_sel = filtro_selectbox("Trabajo Formal", formal["opciones"], "Trabajo Formal", "Todos", formal["conteos"])
+    selecciones['Trabajo Formal'] = formal_sel
+    clave = clave + (formal_sel,)
+    if formal_sel == "Todos":
+        return (*formal["mascaras"], selecciones, clave)
+
+    def mascaras_con_formal():
+        mascara, mascara_sin_excluir = formal["mascaras"]
+        es_formal = formal["codigos"] == formal["textos"].index(formal_sel)
+        if excluir != 'Trabajo Formal':
+            mascara_sin_excluir = mascara_sin_excluir & es_formal
+        return _solo_lectura(mascara & es_formal, mascara_sin_excluir)
+
+    mascara, mascara_sin_excluir = cache.recordar(("mascaras",) + clave, mascaras_con_formal)
+    return mascara, mascara_sin_excluir, selecciones, clave
+
+def restricciones(selecciones, excluir=None):
+    """Selecciones de `evaluar_filtros` como pares (columna, valores) para el cubo.
+
+    Con `excluir` se omite ese filtro (el denominador de una tasa).
+    """
+    pares = []
+    for filtro, (_, col, todas_label) in FILTROS_GRADUADO.items():
+        if filtro != excluir and selecciones.get(filtro, todas_label) != todas_label:
+            pares.append((col, [selecciones[filtro]]))
+    if excluir != 'Cohorte' and selecciones.get('Cohorte', "Todos") != "Todos":
+        pares.append(("AnioGraduacion.1", [selecciones['Cohorte']]))
+    if excluir != 'Cohorte_multi' and selecciones.get('Cohorte_multi'):
+        elegidas = [str(c) for c in selecciones['Cohorte_multi']]
+        valores = cargar_indice_filtros().valores("AnioGraduacion.1")
+        pares.append(("AnioGraduacion.1", [c for c in valores if str(c) in elegidas]))
+    if excluir != 'Trabajo Formal' and selecciones.get('Trabajo Formal', "Todos") != "Todos":
+        pares.append(("Empleo formal", [selecciones['Trabajo Formal']]))
+    return pares
+
+def aplicar_filtros(df, incluir=None):
+    """Aplica solo los filtros especificados en `incluir` (lista de strings)."""
+    mascara, _, selecciones, clave = _evaluar_en_panel(df, incluir, None)
+    if mascara.all():
+        return df, selecciones
+    filas = _cache_resultados().recordar(("filas",) + clave, lambda: df[mascara])
+    # Copia superficial: las columnas que agregue la página no llegan a la caché
+    return filas.copy(deep=False), selecciones
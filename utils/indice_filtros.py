@@ -0,0 +1,154 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Columnas de la dimensión de graduados que se filtran en cascada
+COLUMNAS_INDICE = [
+    "regimen.1",
+    "Oferta actual",
+    "FACULTAD",
+    "CarreraHomologada.1",
+    "AnioGraduacion.1",
+]
+
+# Resultados de la cascada (opciones y bitmaps) que guarda cada índice; al
+# llenarse se descartan los usados hace más tiempo
+MAX_CACHE_CASCADA = 512
+
+
+def codigos_persona(df, personas):
+    """Código entero de la persona de cada fila (-1 si no tiene); sin columna, cada fila es una persona."""
+    if personas is None or personas not in df.columns:
+        return np.arange(len(df))
+    return df[personas].fillna(-1).to_numpy(dtype=np.int64)
+
+
+def contar_distintos(codigos, personas, n_valores):
+    """Personas distintas por valor, dados el código de valor y de persona de cada fila.
+
+    Las filas con código o persona negativos (vacíos) no cuentan.
+    """
+    validos = (codigos >= 0) & (personas >= 0)
+    base = int(personas.max()) + 1 if len(personas) else 1
+    pares = pd.unique(codigos[validos].astype(np.int64) * base + personas[validos])
+    return np.bincount(pares // base, minlength=n_valores)
+
+
+class IndiceFiltros:
+    """Bitmaps (uno por valor de cada columna) sobre las filas de `df`.
+
+    Una selección es otro bitmap: se combina con AND contra el bitmap del valor
+    elegido y solo al final se convierte en máscara de filas. Los bits se
+    guardan empaquetados (8 filas por byte). Con `personas` (columna con el
+    código de persona) el índice también cuenta graduados distintos por valor.
+    """
+
+    def __init__(self, df, columnas=COLUMNAS_INDICE, personas=None):
+        self.filas = len(df)
+        self._valores = {}
+        self._bitmaps = {}
+        self._codigos = {}
+        self._personas = codigos_persona(df, personas)
+        self._cache = OrderedDict()
+        self._candado = threading.Lock()  # el índice se comparte entre sesiones
+        for col in columnas:
+            # Mismo orden y mismos valores que mostraban los selectbox
+            valores = sorted(df[col].dropna().unique())
+            codigos = pd.Index(valores).get_indexer(df[col])
+            matriz = np.zeros((len(valores), self.filas), dtype=bool)
+            validos = codigos >= 0
+            matriz[codigos[validos], np.flatnonzero(validos)] = True
+            self._valores[col] = valores
+            self._bitmaps[col] = np.packbits(matriz, axis=1)
+            self._codigos[col] = codigos
+
+    def tamano_bytes(self):
+        """Memoria de bitmaps y códigos (sin la caché de la cascada, que tiene su propio tope)."""
+        arrays = list(self._bitmaps.values()) + list(self._codigos.values())
+        if self._personas is not None:
+            arrays.append(self._personas)
+        return sum(a.nbytes for a in arrays)
+
+    def presentes(self, posiciones):
+        """Bitmap con las filas del índice que aparecen en `posiciones`."""
+        mascara = np.zeros(self.filas, dtype=bool)
+        mascara[posiciones] = True
+        return np.packbits(mascara)
+
+    def opciones(self, col, bitmap):
+        """Valores de `col` con al menos una fila dentro de `bitmap`."""
+        presentes = (self._bitmaps[col] & bitmap).any(axis=1)
+        return [v for v, p in zip(self._valores[col], presentes) if p]
+
+    def conteos(self, col, bitmap):
+        """Graduados distintos dentro de `bitmap` para cada valor de `col`."""
+        dentro = np.unpackbits(bitmap, count=self.filas).astype(bool)
+        conteo = contar_distintos(self._codigos[col][dentro], self._personas[dentro], len(self._valores[col]))
+        return {v: int(n) for v, n in zip(self._valores[col], conteo) if n}
+
+    def valores(self, col):
+        return list(self._valores[col])
+
+    def filtrar(self, bitmap, col, valores):
+        """Restringe `bitmap` a las filas cuyo `col` está en `valores`."""
+        elegidos = [i for i, v in enumerate(self._valores[col]) if v in valores]
+        if not elegidos:
+            return np.zeros_like(bitmap)
+        return bitmap & np.bitwise_or.reduce(self._bitmaps[col][elegidos], axis=0)
+
+    def mascara(self, bitmap, posiciones):
+        """Máscara booleana de las filas del DataFrame que referencian `posiciones`."""
+        return np.unpackbits(bitmap, count=self.filas).astype(bool)[posiciones]
+
+    def recordar(self, clave, calcular):
+        """Devuelve el resultado guardado para `clave` o lo calcula y lo guarda (LRU)."""
+        with self._candado:
+            if clave in self._cache:
+                self._cache.move_to_end(clave)
+                return self._cache[clave]
+        valor = calcular()
+        with self._candado:
+            self._cache[clave] = valor
+            while len(self._cache) > MAX_CACHE_CASCADA:
+                self._cache.popitem(last=False)
+        return valor
+
+
+class Cascada:
+    """Selecciones en curso sobre un IndiceFiltros.
+
+    La ruta (filas de partida + cada columna y valores elegidos en orden)
+    identifica el estado de la cascada, así que volver a dibujar los filtros
+    con las mismas selecciones solo consulta la caché del índice.
+    """
+
+    def __init__(self, indice, bitmap):
+        self.indice = indice
+        self.bitmap = bitmap  # filas de partida (ver IndiceFiltros.presentes)
+        self.ruta = (hashlib.blake2b(self.bitmap, digest_size=16).digest(),)
+
+    def opciones(self, col):
+        bitmap = self.bitmap
+        return self.indice.recordar(("opciones", self.ruta, col), lambda: self.indice.opciones(col, bitmap))
+
+    def conteos(self, col):
+        bitmap = self.bitmap
+        return self.indice.recordar(("conteos", self.ruta, col), lambda: self.indice.conteos(col, bitmap))
+
+    def filtrar(self, col, valores):
+        bitmap = self.bitmap
+        self.ruta += ((col, tuple(valores)),)
+        self.bitmap = self.indice.recordar(("bitmap", self.ruta), lambda: self.indice.filtrar(bitmap, col, valores))
+
+
+def valores_como_texto(serie):
+    """Códigos por fila y texto de cada valor distinto de `serie`.
+
+    Convierte a texto solo los valores distintos (no cada fila), para comparar
+    contra una selección guardada como texto.
+    """
+    codigos, distintos = pd.factorize(serie)
+    return codigos, np.array([str(v) for v in distintos], dtype=object)
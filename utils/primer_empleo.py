@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+# Un graduado es una persona en una cohorte: cada título se resuelve por separado
+CLAVE_GRADUADO = ["id_persona", "AnioGraduacion.1"]
+
+# Situación de cada graduado según la fecha de su primer empleo
+ANTES_GRADUACION = "Antes de graduarse"
+DESPUES_GRADUACION = "Después de graduarse"
+SIN_EMPLEO = "Sin empleo"
+
+
+def primer_empleo(df, por=CLAVE_GRADUADO):
+    """Fecha de ingreso al primer empleo de cada graduado de `df` (todas las cohortes a la vez).
+
+    Entre las filas con `Esta_empleado` de cada grupo `por`, es el primer
+    FECINGAFI.1 igual o posterior a la fecha de graduación; si no hay
+    ninguno, el último anterior, y NaT si no hay fechas de ingreso. La fecha
+    de graduación es la de la fila con el ingreso más antiguo. Devuelve
+    columnas `por` + FechaIngresoPrimerEmpleo, un registro por grupo con
+    empleo.
+    """
+    por = list(por)
+    emp = df[df["Esta_empleado"]].sort_values(por + ["FECINGAFI.1"])
+
+    # Los grupos quedan contiguos: cada fila toma la graduación de la primera de su grupo
+    grupo = emp.groupby(por, sort=False, dropna=False).ngroup().to_numpy()
+    nuevo = np.diff(grupo, prepend=-1) != 0
+    graduacion = emp["FechaGraduacion.1"].to_numpy()[np.flatnonzero(nuevo)][np.cumsum(nuevo) - 1]
+
+    ingreso = emp["FECINGAFI.1"]
+    claves = [emp[col] for col in por]
+    posterior = ingreso.where(ingreso >= graduacion).groupby(claves).min()
+    anterior = ingreso.where(ingreso < graduacion).groupby(claves).max()
+    return posterior.fillna(anterior).rename("FechaIngresoPrimerEmpleo").reset_index()
+
+
+def meses_completos(desde, hasta):
+    """Meses completos de `desde` a `hasta`, fila a fila (como relativedelta: años * 12 + meses).
+
+    Un mes se cumple el mismo día del mes siguiente, o el último día si ese
+    mes es más corto. Es NaN donde falta `hasta` y 0 donde `hasta` es
+    anterior a `desde` o falta `desde`.
+    """
+    desde = pd.Series(desde).to_numpy(dtype="datetime64[us]")
+    hasta = pd.Series(hasta).to_numpy(dtype="datetime64[us]")
+    validas = ~np.isnat(desde) & ~np.isnat(hasta) & (hasta >= desde)
+
+    mes_desde = desde.astype("datetime64[M]")
+    mes_hasta = hasta.astype("datetime64[M]")
+    meses = (mes_hasta - mes_desde).astype(np.int64)
+
+    # `desde` corrido esos meses, con el día recortado al largo del mes de `hasta`
+    dia = (desde.astype("datetime64[D]") - mes_desde.astype("datetime64[D]")).astype(np.int64)
+    largo = ((mes_hasta + 1).astype("datetime64[D]") - mes_hasta.astype("datetime64[D]")).astype(np.int64)
+    hora = desde - desde.astype("datetime64[D]")
+    corrida = mes_hasta.astype("datetime64[D]") + np.minimum(dia, largo - 1).astype("timedelta64[D]") + hora
+    meses = meses - (hasta < corrida)
+
+    resultado = np.where(validas, meses, 0).astype(float)
+    resultado[np.isnat(hasta)] = np.nan
+    return resultado
+
+
+def tiempos_primer_empleo(df, por=CLAVE_GRADUADO):
+    """Un registro por graduado (su primera fila en `df`) con su primer empleo.
+
+    Agrega FechaIngresoPrimerEmpleo, "Meses al primer empleo" y "Situación"
+    (ANTES_GRADUACION, DESPUES_GRADUACION o SIN_EMPLEO; vacía si falta la
+    fecha de graduación). Las filas quedan en el orden de
+    `df.drop_duplicates(subset=por)`.
+    """
+    graduados = df.drop_duplicates(subset=list(por))
+    graduados = graduados.merge(primer_empleo(df, por), on=list(por), how="left")
+    ingreso, graduacion = graduados["FechaIngresoPrimerEmpleo"], graduados["FechaGraduacion.1"]
+    graduados["Meses al primer empleo"] = meses_completos(graduacion, ingreso)
+    graduados["Situación"] = np.select(
+        [ingreso.isna(), ingreso < graduacion, ingreso >= graduacion],
+        [SIN_EMPLEO, ANTES_GRADUACION, DESPUES_GRADUACION],
+        None,
+    )
+    return graduados
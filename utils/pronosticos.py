@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from utils.tendencias import ajuste_lineal
+
+# Series que se pronostican: una por carrera y cohorte
+SERIES_PRONOSTICO = ["CarreraHomologada.1", "AnioGraduacion.1"]
+
+# Trimestres hacia adelante
+HORIZONTE = 4
+
+# Cuantil 0,975 de la t de Student por grados de libertad (bandas del 95 %);
+# con más de 30 grados se usa el de la normal
+_T_975 = [
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+]
+
+
+def _cuantil_t(grados):
+    tabla = np.append(_T_975, 1.96)
+    return tabla[np.clip(grados, 1, len(_T_975) + 1) - 1]
+
+
+def periodos_siguientes(ultimo, n):
+    """Los `n` periodos ("2024 Q4" -> "2025 Q1", ...) que siguen a `ultimo`."""
+    anio, trimestre = int(ultimo[:4]), int(ultimo[-1])
+    siguientes = []
+    for _ in range(n):
+        anio, trimestre = (anio + 1, 1) if trimestre == 4 else (anio, trimestre + 1)
+        siguientes.append(f"{anio} Q{trimestre}")
+    return siguientes
+
+
+def pronosticar(historico, series, periodos, horizonte=HORIZONTE):
+    """Pronóstico lineal de `tasa` para todas las series de `historico` a la vez.
+
+    `historico` trae una fila por serie (columnas `series`) y "Periodo", con
+    su "tasa"; `periodos` son todos los periodos de los datos, en orden. Cada
+    serie se ajusta con una recta contra la posición del periodo en
+    `periodos`, así que los trimestres sin datos no acortan la serie, y se
+    proyecta a los `horizonte` trimestres que siguen al último de `periodos`.
+    La banda es el intervalo de predicción del 95 % de esa recta; con menos de
+    tres puntos no hay residuos para estimarla y queda vacía. Tasas y bandas
+    se recortan a [0, 1].
+    """
+    series = list(series)
+    claves = historico[series].apply(tuple, axis=1) if len(historico) else pd.Series([], dtype=object)
+    codigos, unicas = pd.factorize(claves, sort=True)
+    n_series = len(unicas)
+    x = pd.Categorical(historico["Periodo"], categories=periodos).codes.astype(float)
+    y = historico["tasa"].to_numpy(dtype=float)
+    n, media_x, media_y, sxx, pendiente, residuos = ajuste_lineal(codigos, x, y, n_series)
+
+    # Todas las series por todos los trimestres futuros (series x horizonte)
+    x_futuro = len(periodos) - 1 + np.arange(1, horizonte + 1)
+    distancia = x_futuro[None, :] - media_x[:, None]
+    estimada = media_y[:, None] + pendiente[:, None] * distancia
+    with np.errstate(divide="ignore", invalid="ignore"):
+        varianza = np.where(n >= 3, residuos / (n - 2), np.nan)
+        error = np.sqrt(varianza[:, None] * (1 + 1 / n[:, None] + distancia ** 2 / sxx[:, None]))
+    margen = _cuantil_t(n - 2)[:, None] * error
+
+    pronostico = pd.DataFrame(
+        [clave for clave in unicas for _ in range(horizonte)], columns=series
+    ).astype({col: historico[col].dtype for col in series})
+    pronostico["Periodo"] = np.tile(periodos_siguientes(periodos[-1], horizonte), n_series) if n_series else []
+    pronostico["tasa"] = np.clip(estimada, 0, 1).ravel()
+    pronostico["inferior"] = np.clip(estimada - margen, 0, 1).ravel()
+    pronostico["superior"] = np.clip(estimada + margen, 0, 1).ravel()
+    pronostico["pendiente"] = np.repeat(pendiente, horizonte)
+    return pronostico
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from utils.primer_empleo import ANTES_GRADUACION, DESPUES_GRADUACION, SIN_EMPLEO, meses_completos
+
+
+def fecha_corte(df):
+    """Último día del mes más reciente observado en `df` (Anio.1, Mes.1)."""
+    meses = pd.DataFrame({"year": df["Anio.1"], "month": df["Mes.1"], "day": 1}).dropna().astype(int)
+    return pd.to_datetime(meses).max() + pd.offsets.MonthEnd(0)
+
+
+def datos_supervivencia(tiempos, corte):
+    """`tiempos` (de tiempos_primer_empleo) con "Evento" y "Meses observados".
+
+    Quien consiguió empleo es un evento en sus meses al primer empleo (0 si
+    ya trabajaba al graduarse); quien aún no, una observación censurada en
+    los meses completos entre su graduación y `corte`. Los que se graduaron
+    después de `corte`, con o sin empleo, o no tienen fecha de graduación,
+    quedan con "Meses observados" vacío y no entran en las curvas: dejar
+    solo a los que ya trabajan empujaría esas cohortes hacia 0.
+    """
+    situacion = tiempos["Situación"]
+    observado = tiempos["FechaGraduacion.1"] <= corte
+    evento = (situacion.isin([ANTES_GRADUACION, DESPUES_GRADUACION]) & observado).to_numpy()
+    censurado = ((situacion == SIN_EMPLEO) & observado).to_numpy()
+    censura = meses_completos(tiempos["FechaGraduacion.1"], pd.Series(corte, index=tiempos.index))
+    return tiempos.assign(**{
+        "Evento": evento,
+        "Meses observados": np.select(
+            [evento, censurado], [tiempos["Meses al primer empleo"].to_numpy(), censura], np.nan
+        ),
+    })
+
+
+def kaplan_meier(conteos, grupos, cantidad="graduados"):
+    """Curvas de Kaplan–Meier de todos los `grupos` de `conteos` a la vez.
+
+    `conteos` trae, por combinación de `grupos`, "Evento" y "Meses
+    observados", el número de graduados en `cantidad`. Eventos y censuras se
+    acumulan en una matriz grupos x meses: en riesgo en el mes t están los
+    que siguen observados en t, y la supervivencia (proporción aún sin
+    empleo) es el producto de 1 - eventos / en riesgo hasta t. Devuelve una
+    fila por grupo y mes con alguien en riesgo: `grupos` + "Meses",
+    "en_riesgo", "eventos", "censurados" y "supervivencia".
+    """
+    grupos = list(grupos)
+    conteos = conteos[conteos[cantidad] > 0]
+    claves = conteos[grupos].apply(tuple, axis=1) if len(conteos) else pd.Series([], dtype=object)
+    codigos, unicas = pd.factorize(claves, sort=True)
+    meses = conteos["Meses observados"].to_numpy(dtype=float).astype(np.int64)
+    n = conteos[cantidad].to_numpy(dtype=float)
+    es_evento = conteos["Evento"].to_numpy(dtype=bool)
+    forma = (len(unicas), int(meses.max()) + 1 if len(meses) else 0)
+
+    eventos = np.zeros(forma)
+    censurados = np.zeros(forma)
+    np.add.at(eventos, (codigos[es_evento], meses[es_evento]), n[es_evento])
+    np.add.at(censurados, (codigos[~es_evento], meses[~es_evento]), n[~es_evento])
+
+    # En riesgo en t: los que salen (evento o censura) en t o después
+    en_riesgo = (eventos + censurados)[:, ::-1].cumsum(axis=1)[:, ::-1]
+    riesgo = np.divide(eventos, en_riesgo, out=np.zeros(forma), where=en_riesgo > 0)
+    supervivencia = np.cumprod(1 - riesgo, axis=1)
+
+    grupo, mes = np.nonzero(en_riesgo > 0)
+    curvas = pd.DataFrame([unicas[g] for g in grupo], columns=grupos)
+    if len(conteos):
+        curvas = curvas.astype({col: conteos[col].dtype for col in grupos})
+    curvas["Meses"] = mes
+    curvas["en_riesgo"] = en_riesgo[grupo, mes]
+    curvas["eventos"] = eventos[grupo, mes]
+    curvas["censurados"] = censurados[grupo, mes]
+    curvas["supervivencia"] = supervivencia[grupo, mes]
+    return curvas
+
+
+def medianas(curvas, grupos):
+    """Primer mes en que la supervivencia de cada grupo llega a 0,5 (NaN si no llega)."""
+    grupos = list(grupos)
+    alcanzada = curvas[curvas["supervivencia"] <= 0.5]
+    mediana = alcanzada.groupby(grupos, observed=True)["Meses"].min()
+    return (
+        curvas[grupos].drop_duplicates()
+        .merge(mediana.rename("mediana").reset_index(), on=grupos, how="left")
+        .reset_index(drop=True)
+    )
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from utils.indice_filtros import codigos_persona, contar_distintos
+
+
+def _codificar_grupos(df, grupos):
+    # Código entero de cada columna de agrupación (-1 en vacíos) y sus valores
+    # distintos en el mismo orden que daría groupby
+    codigos, valores = [], []
+    for col in grupos:
+        c, v = pd.factorize(df[col], sort=True)
+        codigos.append(c)
+        valores.append(v)
+    return codigos, valores
+
+
+def _clave(codigos, tamanos, filas):
+    # Combina los códigos de varias columnas en uno solo (-1 si alguno es
+    # vacío); sin columnas, todas las filas forman un único grupo
+    if not codigos:
+        return np.zeros(filas, dtype=np.int64)
+    validos = np.logical_and.reduce([c >= 0 for c in codigos])
+    clave = np.ravel_multi_index([np.where(validos, c, 0) for c in codigos], tamanos)
+    return np.where(validos, clave, -1)
+
+
+def resumir_tasas(grupos, codigos, valores, persona, empleado, en_total, total_por=None):
+    """Núcleo de `tasas_empleo` sobre códigos ya calculados.
+
+    `codigos` trae, por cada columna de `grupos`, el código de cada registro
+    en `valores` (-1 si es vacío); `persona`, `empleado` y `en_total` son el
+    código de persona, el numerador y el denominador de cada registro. Lo
+    usan tanto las filas de "Limpia" como las entradas del cubo.
+    """
+    grupos = list(grupos)
+    total_por = grupos if total_por is None else list(total_por)
+    tamanos = [len(v) for v in valores]
+    n_grupos = int(np.prod(tamanos))
+    clave = _clave(codigos, tamanos, len(persona))
+
+    # Numerador y presencia de cada grupo en una sola pasada
+    empleados = contar_distintos(clave[empleado], persona[empleado], n_grupos)
+    presentes = np.bincount(clave[en_total & (clave >= 0)], minlength=n_grupos) > 0
+
+    # Denominador: agrupado solo por `total_por` y repartido a cada grupo
+    posiciones = [grupos.index(col) for col in total_por]
+    tamanos_total = [tamanos[i] for i in posiciones]
+    n_total = int(np.prod(tamanos_total))
+    clave_total = _clave([codigos[i] for i in posiciones], tamanos_total, len(persona))
+    totales = contar_distintos(clave_total[en_total], persona[en_total], n_total)
+
+    indices = np.flatnonzero(presentes)
+    coordenadas = np.unravel_index(indices, tamanos) if grupos else ()
+    if total_por:
+        total = totales[np.ravel_multi_index([coordenadas[i] for i in posiciones], tamanos_total)]
+    else:
+        total = np.full(len(indices), totales[0])
+
+    resumen = pd.DataFrame({col: valores[i].take(coordenadas[i]) for i, col in enumerate(grupos)})
+    resumen["empleados"] = empleados[indices]
+    resumen["total"] = total
+    resumen = resumen[resumen["total"] > 0].reset_index(drop=True)
+    resumen["tasa"] = resumen["empleados"] / resumen["total"]
+    return resumen
+
+
+def tasas_empleo(df, grupos, mascara, mascara_total=None, total_por=None, personas="id_persona"):
+    """Graduados empleados, total y tasa por cada combinación de `grupos`.
+
+    El numerador son las personas distintas con `Esta_empleado` dentro de
+    `mascara`; el denominador, las personas distintas dentro de
+    `mascara_total` (por defecto la misma `mascara`), agrupadas por
+    `total_por` (subconjunto de `grupos`; por defecto todos). Devuelve una fila
+    por combinación presente en el denominador y con total > 0, ordenadas como
+    las daría groupby, con columnas `grupos` + empleados, total y tasa.
+    """
+    mascara = np.asarray(mascara, dtype=bool)
+    mascara_total = mascara if mascara_total is None else np.asarray(mascara_total, dtype=bool)
+    codigos, valores = _codificar_grupos(df, list(grupos))
+    empleado = mascara & df["Esta_empleado"].to_numpy(dtype=bool, na_value=False)
+    return resumir_tasas(
+        grupos, codigos, valores, codigos_persona(df, personas), empleado, mascara_total, total_por
+    )
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+
+def ajuste_lineal(codigos, x, y, n_grupos):
+    """Recta de mínimos cuadrados de `y` contra `x` para cada grupo de `codigos`.
+
+    Devuelve, por grupo, el número de puntos, las medias de x e y, la suma de
+    cuadrados de x centrada, la pendiente (0 con menos de dos puntos o sin
+    variación en x) y la suma de cuadrados de los residuos.
+    """
+    n = np.bincount(codigos, minlength=n_grupos)
+    con_datos = n > 0
+    media_x = np.divide(np.bincount(codigos, weights=x, minlength=n_grupos), n, out=np.zeros(n_grupos), where=con_datos)
+    media_y = np.divide(np.bincount(codigos, weights=y, minlength=n_grupos), n, out=np.zeros(n_grupos), where=con_datos)
+
+    # Datos centrados en la media de cada grupo, como en LinearRegression
+    dx = x - media_x[codigos]
+    dy = y - media_y[codigos]
+    sxx = np.bincount(codigos, weights=dx * dx, minlength=n_grupos)
+    sxy = np.bincount(codigos, weights=dx * dy, minlength=n_grupos)
+    pendiente = np.divide(sxy, sxx, out=np.zeros(n_grupos), where=(n >= 2) & (sxx > 0))
+    residuos = np.bincount(codigos, weights=(dy - pendiente[codigos] * dx) ** 2, minlength=n_grupos)
+    return n, media_x, media_y, sxx, pendiente, residuos
+
+
+def tendencias(df, grupo, orden, valor):
+    """Mínimo y pendiente de `valor` para cada `grupo`, en una sola pasada.
+
+    La pendiente es la de mínimos cuadrados de `valor` contra la posición de
+    cada fila dentro de su grupo (0, 1, 2... según `orden`), calculada en forma
+    cerrada con sumas por grupo; un grupo con una sola fila tiene pendiente 0.
+    Los grupos salen en el orden de groupby.
+    """
+    df = df[df[grupo].notnull()].sort_values([grupo, orden])
+    codigos, valores = pd.factorize(df[grupo], sort=True)
+    y = df[valor].to_numpy(dtype=float)
+    n = np.bincount(codigos, minlength=len(valores))
+    inicio = np.concatenate(([0], np.cumsum(n)[:-1]))
+    x = (np.arange(len(df)) - inicio[codigos]).astype(float)
+    pendiente = ajuste_lineal(codigos, x, y, len(valores))[4]
+
+    return pd.DataFrame({
+        grupo: np.asarray(valores, dtype=object),
+        "minimo": np.minimum.reduceat(y, inicio) if len(y) else np.zeros(0),
+        "pendiente": pendiente,
+    })
+
+
+def alertas(tendencia, umbral):
+    """Filas de `tendencias` con mínimo bajo `umbral` o pendiente negativa, con su tipo."""
+    baja = tendencia["minimo"].to_numpy() < umbral
+    desciende = tendencia["pendiente"].to_numpy() < 0
+    tipo = np.select(
+        [baja & desciende, baja, desciende], ["Ambas", "Tasa baja", "Tendencia descendente"], ""
+    )
+    return tendencia.assign(tipo=tipo)[baja | desciende].reset_index(drop=True)
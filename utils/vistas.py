@@ -0,0 +1,187 @@
+import logging
+
+import pandas as pd
+
+from utils.cubo import DIMENSIONES_CUBO, DIMENSIONES_TEXTO, CuboGraduados
+from utils.enriquecimiento import rellenar_vacios
+from utils.indice_filtros import COLUMNAS_INDICE
+from utils.primer_empleo import tiempos_primer_empleo
+from utils.supervivencia import datos_supervivencia, fecha_corte
+
+logger = logging.getLogger(__name__)
+
+# Columnas de "Limpia" con que se arman todas las vistas
+COLUMNAS_VISTAS = list(dict.fromkeys(DIMENSIONES_CUBO + [
+    "id_persona",
+    "id_graduado",
+    "Esta_empleado",
+    "Empleo formal normalizado",
+    "Anio.1",
+    "Mes.1",
+    "SALARIO.1",
+    "SECTOR",
+    "OCUAFI.1",
+    "NOMEMP.1",
+    "Tamaño Empresa",
+    "FechaGraduacion.1",
+    "FECINGAFI.1",
+]))
+
+
+def ultimo_por_graduado(df, orden=("Mes.1", "SALARIO.1")):
+    """Un registro por graduado: el de mayor `orden` (mes más reciente y, a igual mes, mayor salario)."""
+    orden = list(orden)
+    return df.sort_values(
+        ["id_persona"] + orden, ascending=[True] + [False] * len(orden)
+    ).drop_duplicates(subset="id_persona", keep="first")
+
+
+class VistaConteos:
+    """Graduados (y sumas de `sumas`) por combinación de `dimensiones`.
+
+    `df` trae un registro por graduado, así que los conteos se suman al
+    agregar: cualquier consulta sobre un subconjunto de las dimensiones sale
+    de esta tabla sin volver a las filas.
+    """
+
+    def __init__(self, df, dimensiones, sumas=()):
+        self.dimensiones = list(dimensiones)
+        self.sumas = list(sumas)
+        df = df.assign(graduados=1, **{
+            # Igual que el filtro "Trabajo Formal": se compara el texto del valor
+            col: df[col].map(lambda v: v if pd.isna(v) else str(v)).astype(object)
+            for col in self.dimensiones if col in DIMENSIONES_TEXTO
+        })
+        medidas = {"graduados": ("graduados", "sum")}
+        for col in self.sumas:
+            medidas[f"{col}_suma"] = (col, "sum")
+            medidas[f"{col}_n"] = (col, "count")
+        self._tabla = (
+            df.groupby(self.dimensiones, observed=True, dropna=False, sort=True)
+            .agg(**medidas)
+            .reset_index()
+        )
+
+    def __len__(self):
+        return len(self._tabla)
+
+    def consultar(self, grupos, filtros=()):
+        """Medidas sumadas por `grupos` sobre las combinaciones que cumplen `filtros`."""
+        tabla = self._tabla
+        for col, valores in filtros:
+            tabla = tabla[tabla[col].isin(valores)]
+        return (
+            tabla.groupby(list(grupos), observed=True, sort=True)
+            .agg({col: "sum" for col in tabla.columns if col not in self.dimensiones})
+            .reset_index()
+        )
+
+
+def conteo_ordenado(resumen, col, categorias):
+    """Graduados por `col` en el orden en que los daría value_counts() sobre esa columna categórica."""
+    return resumen.set_index(col)["graduados"].reindex(categorias, fill_value=0).sort_values(ascending=False, kind="stable")
+
+
+def contar_por(df, grupos, sumas=()):
+    """Lo mismo que una VistaConteos sobre `df` ya filtrado (la consulta en crudo)."""
+    return VistaConteos(df, grupos, sumas).consultar(grupos)
+
+
+class Enrutador:
+    """Vistas materializadas de cada medida y elección de la que responde una consulta.
+
+    Una consulta se responde con la vista más pequeña (menos combinaciones)
+    que tenga todas las columnas que agrupa o filtra; si ninguna las tiene, se
+    calcula con `respaldo` sobre las filas.
+    """
+
+    def __init__(self):
+        self._vistas = {}  # medida -> vistas
+
+    def registrar(self, medida, vista):
+        self._vistas.setdefault(medida, []).append(vista)
+
+    def vista(self, medida, columnas):
+        aptas = [v for v in self._vistas.get(medida, []) if set(columnas) <= set(v.dimensiones)]
+        return min(aptas, key=len, default=None)
+
+    def consultar(self, medida, grupos, filtros, respaldo, **opciones):
+        columnas = list(grupos) + [col for col, _ in filtros]
+        columnas += [col for col, _ in opciones.get("filtros_total") or ()]
+        vista = self.vista(medida, columnas)
+        if vista is None:
+            return respaldo()
+        return vista.consultar(grupos, filtros, **opciones)
+
+    def tamano(self):
+        """Combinaciones guardadas por medida."""
+        return {medida: sum(len(v) for v in vistas) for medida, vistas in self._vistas.items()}
+
+
+def _registrar_conteos(enrutador, medida, base, columna, dimensiones=COLUMNAS_INDICE, sumas=()):
+    # De la más fina a la más gruesa; el enrutador elige la menor que sirva
+    for dims in (list(dimensiones) + [columna], ["AnioGraduacion.1", columna], [columna]):
+        enrutador.registrar(medida, VistaConteos(base, dims, sumas))
+
+
+def construir_vistas(limpia, cubo):
+    """Vistas de la hoja "Limpia" (con COLUMNAS_VISTAS) para una versión de los datos.
+
+    Cada base repite el preprocesamiento de su página hasta el registro único
+    por graduado. Las páginas que eligen ese registro después de filtrar
+    (tamaño, cargos y empresas) solo tienen vistas por atributos fijos del
+    graduado, y solo si cada persona tiene un único registro de graduado:
+    con filtros por fila, o con personas de más de una carrera o nivel, se
+    responden en crudo.
+    """
+    enrutador = Enrutador()
+
+    # Tasas de empleo (páginas 1 a 4)
+    enrutador.registrar("tasas", cubo)
+    enrutador.registrar("tasas", CuboGraduados(limpia, ["AnioGraduacion.1", "Empleo formal", "Periodo"]))
+
+    # Sector económico (página 8): último mes con empleo y sector de cada graduado
+    sector = limpia[limpia["Esta_empleado"] & limpia["SECTOR"].notnull() & limpia["Mes.1"].notnull()]
+    sector = ultimo_por_graduado(sector, ("Mes.1",))
+    _registrar_conteos(enrutador, "sector", sector, "SECTOR", COLUMNAS_INDICE + ["Empleo formal"])
+
+    # Las páginas 10 a 12 eligen el registro de cada persona después de
+    # filtrar. Elegirlo antes, como hace la vista, da lo mismo solo si todas
+    # las filas de la persona tienen los mismos atributos del graduado; la
+    # página 8 lo elige antes de filtrar, así que su vista siempre coincide
+    if (limpia.groupby("id_persona")["id_graduado"].nunique() <= 1).all():
+        _registrar_tras_filtrar(enrutador, limpia)
+    else:
+        logger.info("Hay personas con más de un registro de graduado: tamaño, cargos y empresas en crudo")
+
+    # Tiempo al primer empleo (página 5): matriz cohorte x meses desde la
+    # graduación, por situación, de todas las cohortes; y los mismos graduados
+    # como eventos o censuras al corte de los datos, para las curvas de
+    # supervivencia (que no se suman entre celdas, así que se guardan los conteos)
+    tiempos = tiempos_primer_empleo(limpia)
+    supervivencia = datos_supervivencia(tiempos, fecha_corte(limpia))
+    for medida, base, columnas in (
+        ("primer_empleo", tiempos, ["Situación", "Meses al primer empleo"]),
+        ("supervivencia", supervivencia, ["Evento", "Meses observados"]),
+    ):
+        for dims in (COLUMNAS_INDICE + ["Empleo formal"] + columnas, ["AnioGraduacion.1"] + columnas):
+            enrutador.registrar(medida, VistaConteos(base, dims))
+    return enrutador
+
+
+def _registrar_tras_filtrar(enrutador, limpia):
+    """Vistas de las páginas 10 a 12, que eligen el último registro después de filtrar."""
+    # Tamaño de empresa (página 10)
+    tamano = limpia[limpia["Esta_empleado"] & limpia["Tamaño Empresa"].notnull()]
+    _registrar_conteos(enrutador, "tamano", ultimo_por_graduado(tamano), "Tamaño Empresa")
+
+    # Cargos (página 12) y empresas (página 11): sin registros 'DESCONOCIDO'
+    conocidos = limpia[limpia["Empleo formal normalizado"] != "DESCONOCIDO"]
+    cargos = conocidos.assign(**{
+        "OCUAFI.1": rellenar_vacios(conocidos["OCUAFI.1"], "SIN INFORMACIÓN")
+    })
+    _registrar_conteos(enrutador, "cargos", ultimo_por_graduado(cargos), "OCUAFI.1", sumas=["SALARIO.1"])
+    empresas = conocidos.assign(**{
+        "NOMEMP.1": rellenar_vacios(conocidos["NOMEMP.1"], "SIN EMPRESA")
+    })
+    _registrar_conteos(enrutador, "empresas", ultimo_por_graduado(empresas), "NOMEMP.1")